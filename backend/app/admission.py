@@ -0,0 +1,191 @@
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Tuple
+
+class TokenBucket:
+    """Token bucket state for a single client: two floats, nothing else"""
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+class ClientRateLimiter:
+    """
+    Per-client token-bucket rate limiter.
+    Keeps one bucket per active client and evicts the least recently seen
+    client once `max_clients` is reached, so memory stays bounded.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def allow(self, client: str, now: Optional[float] = None) -> Tuple[bool, float]:
+        """
+        Take one token for the client.
+        Returns whether the request is allowed and, if not, seconds until it would be.
+        """
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = TokenBucket(self.burst, now)
+            self._buckets[client] = bucket
+            if len(self._buckets) > self.max_clients:
+                # An idle client's bucket would have refilled anyway, dropping it is lossless
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+
+        if bucket.tokens >= 1.0:
+            bucket.tokens -= 1.0
+            return True, 0.0
+        return False, (1.0 - bucket.tokens) / self.rate
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+class AdmissionGate:
+    """
+    Concurrency limiter for one route class.
+    Requests beyond `max_concurrent` wait in a FIFO queue; the queue is capped at
+    `max_queue` entries and no request waits longer than `max_wait` seconds.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """Wait for a slot. Returns False when the request should be shed."""
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.max_queue or self.max_wait <= 0:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+            return True
+        except asyncio.TimeoutError:
+            # Since 3.12 a hand-over can land in the same iteration as the timeout
+            return waiter.done() and not waiter.cancelled()
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before the cancellation landed
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    def release(self) -> None:
+        """Hand the slot to the next waiter, or free it"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+def classify_route(path: str) -> Optional[str]:
+    """
+    Map a request to its admission class.
+    `list` covers reads answered from the loaded dataset and its indexes,
+    `detail` covers per-country lookups and flag images, which may have to go upstream.
+    `stream` covers long-lived change streams, which are rate limited but hold no
+    concurrency slot. Health checks and docs are never limited.
+    """
+    path = path.rstrip("/") or "/"
+    if path in ("/countries", "/stats"):
+        return "list"
+    if path == "/countries/changes":
+        return "stream"
+    if path.startswith("/countries/") and path.endswith(("/nearby", "/neighbors")):
+        return "list"
+    if path.startswith(("/countries/", "/flags/")):
+        return "detail"
+    return None
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware applying per-client rate limiting and per-route-class
+    concurrency limits. Excess load is shed early with 429/503 and `Retry-After`
+    instead of queueing behind slow upstream calls until everything times out.
+    """
+
+    def __init__(
+        self,
+        app,
+        gates: Dict[str, AdmissionGate],
+        rate_limiter: Optional[ClientRateLimiter] = None,
+        retry_after: float = 1.0,
+    ):
+        self.app = app
+        self.gates = gates
+        self.rate_limiter = rate_limiter
+        self.retry_after = retry_after
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify_route(scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        if self.rate_limiter is not None:
+            client = scope.get("client")
+            allowed, wait = self.rate_limiter.allow(client[0] if client else "unknown")
+            if not allowed:
+                await self._reject(send, 429, "Rate limit exceeded", wait)
+                return
+
+        gate = self.gates.get(route_class)
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await gate.acquire():
+            await self._reject(send, 503, "Server is overloaded, please retry later", self.retry_after)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+    @staticmethod
+    async def _reject(send, status: int, detail: str, retry_after: float) -> None:
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+from .store import CountryStore
+
+# Fields of the /countries entries that deltas track
+DELTA_FIELDS = ("flag", "population", "region")
+
+def diff_stores(old: CountryStore, new: CountryStore) -> List[dict]:
+    """
+    Compact per-country differences between two datasets, keyed by name.
+    Updates carry only the fields that changed.
+    """
+    def rows(store: CountryStore) -> Dict[str, Tuple]:
+        return {r.name: tuple(getattr(r, f) for f in DELTA_FIELDS) for r in store}
+
+    before, after = rows(old), rows(new)
+    changes: List[dict] = []
+    for name, values in after.items():
+        previous = before.get(name)
+        if previous is None:
+            changes.append({"op": "add", "name": name, **dict(zip(DELTA_FIELDS, values))})
+        elif previous != values:
+            changes.append({"op": "update", "name": name, **{
+                field: value
+                for field, value, old_value in zip(DELTA_FIELDS, values, previous)
+                if value != old_value
+            }})
+    changes.extend({"op": "remove", "name": name} for name in before if name not in after)
+    return changes
+
+def _encode(event_id: str, event: str, data: dict) -> bytes:
+    payload = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode()
+
+class ChangeFeed:
+    """
+    Bounded in-memory log of dataset change events, fanned out as SSE.
+
+    Events are encoded once when published and the same bytes are written to
+    every subscriber. Idle subscribers all wait on one shared future that is
+    resolved and replaced on each publish, so a publish costs one wake-up per
+    connection and nothing is kept per connection besides its generator.
+    Event ids are `<epoch>-<sequence>`; an id from another process, or one
+    older than the retained log, makes the stream send a `reset` event so
+    the client refetches `/countries` instead of resuming.
+    """
+
+    def __init__(self, max_events: int = 1000, heartbeat: float = 15.0, retry_ms: int = 3000):
+        self.heartbeat = heartbeat
+        self.retry_ms = retry_ms
+        self._epoch = format(int(time.time() * 1000), "x")
+        self._sequence = 0
+        self._log: Deque[Tuple[int, bytes]] = deque(maxlen=max_events)
+        self._version: Optional[str] = None
+        self._published: Optional[asyncio.Future] = None
+        self.subscribers = 0
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._version
+
+    @property
+    def last_event_id(self) -> str:
+        return f"{self._epoch}-{self._sequence}"
+
+    def publish(self, version: str, changes: Optional[List[dict]] = None) -> None:
+        """Record a new dataset version and its deltas, and wake subscribers"""
+        previous, self._version = self._version, version
+        self._append("version", {"version": version, "previous": previous})
+        if changes:
+            self._append("delta", {"version": version, "changes": changes})
+        if self._published is not None and not self._published.done():
+            self._published.set_result(None)
+        self._published = None
+
+    def _append(self, event: str, data: dict) -> None:
+        self._sequence += 1
+        self._log.append((self._sequence, _encode(self.last_event_id, event, data)))
+
+    def since(self, last_event_id: Optional[str]) -> Optional[List[bytes]]:
+        """
+        Encoded events after `last_event_id`, or None when the client cannot
+        resume (unknown epoch, or events it missed have left the log).
+        """
+        epoch, _, sequence = (last_event_id or "").partition("-")
+        if epoch != self._epoch or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        if sequence > self._sequence:
+            return None
+        oldest = self._log[0][0] if self._log else self._sequence + 1
+        if sequence < oldest - 1:
+            return None
+        return [event for number, event in self._log if number > sequence]
+
+    def _next_publish(self) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        if self._published is None or self._published.get_loop() is not loop:
+            self._published = loop.create_future()
+        return self._published
+
+    async def stream(self, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """Encoded SSE for one subscriber, resuming after `last_event_id` when possible"""
+        self.subscribers += 1
+        try:
+            backlog = self.since(last_event_id) if last_event_id else None
+            if backlog is None:
+                event = "reset" if last_event_id else "version"
+                backlog = [_encode(self.last_event_id, event, {"version": self._version})]
+            # Taken before the first yield so nothing published meanwhile is skipped
+            sequence = self._sequence
+            yield f"retry: {self.retry_ms}\n\n".encode()
+            for event in backlog:
+                yield event
+
+            while True:
+                # Publishes made while this client was being written to are not waited for
+                if self._sequence == sequence:
+                    try:
+                        await asyncio.wait_for(asyncio.shield(self._next_publish()), self.heartbeat)
+                    except asyncio.TimeoutError:
+                        yield b": keepalive\n\n"
+                        continue
+                missed = self.since(f"{self._epoch}-{sequence}")
+                if missed is None:
+                    # Published faster than this client read: start over
+                    yield _encode(self.last_event_id, "reset", {"version": self._version})
+                    missed = []
+                sequence = self._sequence
+                for event in missed:
+                    yield event
+        finally:
+            self.subscribers -= 1
@@ -1,6 +1,8 @@
-from typing import List
+from typing import AsyncIterator, List, Optional, Tuple
 from fastapi import HTTPException
-from .models import Country, CountryDetails
+from .flags import CachedFlag
+from .sprites import SpriteAtlas
+from .models import Country, CountryDetails, NearbyCountry, StatsResponse
 from .services import CountryService
 
 class CountryController:
@@ -30,20 +32,61 @@ class CountryController:
                 detail="Error processing countries request"
             )
     
+    async def get_encoded_countries(
+        self, media_type: str, lang: Optional[str] = None
+    ) -> Tuple[bytes, str]:
+        """
+        Controller method to get all countries as a pre-encoded response body,
+        with names localised to `lang` if given.
+        Each format and language is encoded once per loaded dataset and reused
+        until it changes. Returns the body and its ETag.
+        """
+        try:
+            return await self.country_service.get_encoded_countries(media_type, lang)
+        except HTTPException:
+            raise
+        except Exception:
+            raise HTTPException(
+                status_code=500,
+                detail="Error encoding countries response"
+            )
+    
+    async def stream_changes(self, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        Controller method to open a stream of dataset change events.
+        Resumes after `last_event_id` when the change log still covers it.
+        """
+        try:
+            return await self.country_service.get_changes(last_event_id)
+        except HTTPException:
+            raise
+        except Exception:
+            raise HTTPException(
+                status_code=500,
+                detail="Error opening changes stream"
+            )
+    
+    async def get_stats(self) -> StatsResponse:
+        """
+        Controller method to get aggregate statistics by region and subregion.
+        """
+        try:
+            return await self.country_service.get_stats()
+        except HTTPException:
+            raise
+        except Exception:
+            raise HTTPException(
+                status_code=500,
+                detail="Error processing statistics request"
+            )
+    
     async def get_country_details(self, country_name: str) -> CountryDetails:
         """
         Controller method to get detailed country information.
         Validates input and coordinates with service layer.
         """
-        # Input validation at controller level
-        if not country_name or not country_name.strip():
-            raise HTTPException(
-                status_code=400, 
-                detail="Country name cannot be empty"
-            )
-        
-        # Normalize country name
-        normalized_name = country_name.strip().lower()
+        # Input validation and normalization at controller level
+        normalized_name = self._normalize_name(country_name)
         
         try:
             country_details = await self.country_service.get_country_by_name(normalized_name)
@@ -69,4 +112,91 @@ class CountryController:
         except HTTPException as e:
             if e.status_code == 404:
                 return False
-            raise  # Re-raise non-404 errors 
\ No newline at end of file
+            raise  # Re-raise non-404 errors
+    
+    async def get_nearby_countries(
+        self, country_name: str, k: int, radius_km: Optional[float] = None
+    ) -> List[NearbyCountry]:
+        """
+        Controller method to get the countries nearest to a country.
+        Validates input and coordinates with service layer.
+        """
+        normalized_name = self._normalize_name(country_name)
+        try:
+            return await self.country_service.get_nearby_countries(normalized_name, k, radius_km)
+        except HTTPException:
+            raise
+        except Exception:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error processing nearby countries request for '{country_name}'"
+            )
+    
+    async def get_country_neighbors(self, country_name: str) -> List[Country]:
+        """
+        Controller method to get the countries bordering a country.
+        Validates input and coordinates with service layer.
+        """
+        normalized_name = self._normalize_name(country_name)
+        try:
+            return await self.country_service.get_country_neighbors(normalized_name)
+        except HTTPException:
+            raise
+        except Exception:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error processing neighbors request for '{country_name}'"
+            )
+    
+    async def get_flag(self, code: str) -> CachedFlag:
+        """
+        Controller method to get a cached flag image by ISO country code.
+        Accepts alpha-2 and alpha-3 codes.
+        """
+        if not code.isalpha() or len(code) not in (2, 3):
+            raise HTTPException(
+                status_code=400,
+                detail="Country code must be an ISO 3166-1 alpha-2 or alpha-3 code"
+            )
+        try:
+            return await self.country_service.get_flag(code)
+        except HTTPException:
+            raise
+        except Exception:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error processing flag request for '{code}'"
+            )
+    
+    def release_flag(self, flag: CachedFlag) -> None:
+        """
+        Controller method to unpin a flag image returned by `get_flag`.
+        Must be called once its response has been sent.
+        """
+        self.country_service.release_flag(flag)
+    
+    async def get_flag_atlas(self, digest: Optional[str] = None) -> SpriteAtlas:
+        """
+        Controller method to get the flag atlas for the current dataset,
+        or only the atlas with the given `digest`.
+        The atlas is built once per dataset version and reused afterwards.
+        """
+        try:
+            return await self.country_service.get_atlas(digest)
+        except HTTPException:
+            raise
+        except Exception:
+            raise HTTPException(
+                status_code=502,
+                detail="Error building flag atlas"
+            )
+    
+    @staticmethod
+    def _normalize_name(country_name: str) -> str:
+        """Reject empty country names and normalize the rest"""
+        if not country_name or not country_name.strip():
+            raise HTTPException(
+                status_code=400,
+                detail="Country name cannot be empty"
+            )
+        return country_name.strip().lower()
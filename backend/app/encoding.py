@@ -0,0 +1,132 @@
+import hashlib
+import json
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from .models import Country
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.flagexplorer.columnar+json"
+MSGPACK = "application/msgpack"
+COLUMNAR_MSGPACK = "application/vnd.flagexplorer.columnar+msgpack"
+
+# Older clients still send the unregistered x- media type
+_ALIASES = {"application/x-msgpack": MSGPACK}
+
+@lru_cache(maxsize=None)
+def _msgpack_available() -> bool:
+    try:
+        import msgpack  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def supported_media_types() -> List[str]:
+    """Media types `/countries` can be served as, in server preference order"""
+    types = [JSON, COLUMNAR_JSON]
+    if _msgpack_available():
+        types += [MSGPACK, COLUMNAR_MSGPACK]
+    return types
+
+def negotiate(accept: Optional[str], supported: Sequence[str]) -> Optional[str]:
+    """
+    Pick the best supported media type for an `Accept` header.
+    Returns None when the client accepts none of them.
+    """
+    if not accept:
+        return supported[0]
+
+    best: Optional[Tuple[float, int, str]] = None
+    for part in accept.split(","):
+        pieces = [p.strip() for p in part.split(";")]
+        media = _ALIASES.get(pieces[0].lower(), pieces[0].lower())
+        quality = 1.0
+        for param in pieces[1:]:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality <= 0:
+            continue
+
+        if media in ("*/*", "application/*"):
+            candidates = [supported[0]]
+        else:
+            candidates = [media] if media in supported else []
+        for candidate in candidates:
+            # Prefer higher q, then exact matches over wildcards
+            rank = (quality, 0 if "*" in media else 1, candidate)
+            if best is None or rank[:2] > best[:2]:
+                best = rank
+    return best[2] if best else None
+
+def to_columns(
+    countries: Sequence[Country], names: Optional[Sequence[str]] = None
+) -> Dict[str, object]:
+    """Lay countries out as parallel arrays, one per field, optionally with other names"""
+    fields = list(Country.model_fields)
+    columns: Dict[str, list] = {field: [] for field in fields}
+    for country in countries:
+        row = country.model_dump()
+        for field in fields:
+            columns[field].append(row[field])
+    if names is not None:
+        columns["name"] = list(names)
+    return {"count": len(countries), "columns": columns}
+
+def _rows(countries: Sequence[Country], names: Optional[Sequence[str]] = None) -> List[dict]:
+    rows = [country.model_dump() for country in countries]
+    if names is not None:
+        for row, name in zip(rows, names):
+            row["name"] = name
+    return rows
+
+def _dump_json(payload) -> bytes:
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+
+def _dump_msgpack(payload) -> bytes:
+    import msgpack
+    return msgpack.packb(payload, use_bin_type=True)
+
+# Each encoder takes the countries and, for localised bodies, a column of names to use instead
+ENCODERS: Dict[str, Callable[..., bytes]] = {
+    JSON: lambda countries, names=None: _dump_json(_rows(countries, names)),
+    COLUMNAR_JSON: lambda countries, names=None: _dump_json(to_columns(countries, names)),
+    MSGPACK: lambda countries, names=None: _dump_msgpack(_rows(countries, names)),
+    COLUMNAR_MSGPACK: lambda countries, names=None: _dump_msgpack(to_columns(countries, names)),
+}
+
+class EncodedPayloadCache:
+    """
+    Encoded response bodies for one dataset, built at most once per format
+    and language. The cache is tied to the identity of the country list it
+    was built from; a new list (i.e. a dataset reload) drops every stored
+    encoding. Localised bodies reuse the same list with another name column.
+    """
+
+    def __init__(self):
+        self._source: Optional[Sequence[Country]] = None
+        self._payloads: Dict[Tuple[Optional[str], str], Tuple[bytes, str]] = {}
+
+    def get(
+        self,
+        countries: Sequence[Country],
+        media_type: str,
+        language: Optional[str] = None,
+        names: Optional[Sequence[str]] = None,
+    ) -> Tuple[bytes, str]:
+        """
+        Return the encoded body and its strong ETag. For a `language`, `names`
+        are that language's country names, row for row
+        """
+        if countries is not self._source:
+            self._source = countries
+            self._payloads = {}
+
+        key = (language, media_type)
+        cached = self._payloads.get(key)
+        if cached is None:
+            body = ENCODERS[media_type](countries, names if language else None)
+            etag = '"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest()
+            cached = self._payloads[key] = (body, etag)
+        return cached
@@ -0,0 +1,271 @@
+import asyncio
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+from starlette.responses import FileResponse
+
+logger = logging.getLogger(__name__)
+
+class CachedFlag(NamedTuple):
+    """A flag image stored in the cache, addressed by its SHA-256 digest"""
+    digest: str
+    path: str
+    media_type: str
+    stat: os.stat_result
+
+class FlagCache:
+    """
+    Content-addressed, size-bounded on-disk cache of flag images.
+
+    Each image is fetched from its source URL once and stored as
+    `objects/<aa>/<sha256>.<ext>`, so identical images share one file. A small
+    JSON index maps source URLs to digests so the cache survives restarts.
+    When the total size exceeds `max_bytes` the least recently served images
+    are deleted. Concurrent misses for the same URL share one download.
+    Images can be pinned while a response or an atlas build is reading them;
+    pinned images are not deleted until released. Disk work (loading the
+    index, writing and deleting objects) runs in worker threads.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, directory: str, max_bytes: int, timeout: float = 10.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._urls: Dict[str, str] = {}
+        # Reverse of `_urls`, so evicting an image drops its URLs directly
+        self._digest_urls: Dict[str, Set[str]] = {}
+        self._entries: "OrderedDict[str, CachedFlag]" = OrderedDict()
+        self._size = 0
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._pins: Dict[str, int] = {}
+        self._removals: Set[asyncio.Task] = set()
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+
+    @property
+    def size(self) -> int:
+        """Total bytes of cached images"""
+        return self._size
+
+    async def get(self, url: str, pin: bool = False) -> CachedFlag:
+        """
+        Return the cached image for `url`, downloading it on a miss.
+        With `pin`, the file is kept until `release(digest)` is called.
+        """
+        await self._load()
+        while True:
+            digest = self._urls.get(url)
+            if digest is not None and digest in self._entries:
+                self._entries.move_to_end(digest)
+                if pin:
+                    self._pins[digest] = self._pins.get(digest, 0) + 1
+                return self._entries[digest]
+
+            task = self._pending.get(url)
+            if task is None:
+                task = asyncio.ensure_future(self._fetch(url))
+                self._pending[url] = task
+                task.add_done_callback(lambda _: self._pending.pop(url, None))
+            # Looked up again: another download may have evicted it before this resumed
+            await asyncio.shield(task)
+
+    def release(self, digest: str) -> None:
+        """Unpin an image returned by `get(..., pin=True)`"""
+        count = self._pins.get(digest, 0) - 1
+        if count > 0:
+            self._pins[digest] = count
+        else:
+            self._pins.pop(digest, None)
+            removed = self._evict()
+            if removed:
+                self._write_back(removed)
+
+    async def _fetch(self, url: str) -> CachedFlag:
+        # Deferred import: only needed when an image is not cached yet
+        import httpx
+
+        async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True) as client:
+            response = await client.get(url)
+            response.raise_for_status()
+
+        body = response.content
+        media_type = response.headers.get("content-type", "").split(";")[0].strip()
+        if not media_type.startswith("image/"):
+            media_type = mimetypes.guess_type(url)[0] or "image/png"
+        digest = hashlib.sha256(body).hexdigest()
+
+        if self._removals:
+            # An evicted copy of this image may still be queued for deletion
+            await asyncio.gather(*self._removals, return_exceptions=True)
+        if digest not in self._entries:
+            extension = mimetypes.guess_extension(media_type) or ""
+            path = os.path.join(self.directory, "objects", digest[:2], digest + extension)
+            stat = await asyncio.to_thread(self._write_object, path, body)
+            self._entries[digest] = CachedFlag(digest, path, media_type, stat)
+            self._size += stat.st_size
+        self._entries.move_to_end(digest)
+        self._urls[url] = digest
+        self._digest_urls.setdefault(digest, set()).add(url)
+        entry = self._entries[digest]
+
+        removed = self._evict()
+        await self._write_back(removed, self._snapshot())
+        logger.info("Cached flag %s (%d bytes in cache)", url, self._size)
+        return entry
+
+    def _evict(self) -> List[str]:
+        """
+        Drop least recently served images until the cache fits in `max_bytes`.
+        The most recent image is always kept so it can still be served, and
+        pinned images are skipped until they are released. Returns the paths
+        of the dropped files; the caller deletes them with `_write_back`.
+        """
+        removed: List[str] = []
+        if self._size <= self.max_bytes:
+            return removed
+        newest = next(reversed(self._entries), None)
+        for digest in list(self._entries):
+            if self._size <= self.max_bytes:
+                break
+            if digest == newest or digest in self._pins:
+                continue
+            entry = self._entries.pop(digest)
+            self._size -= entry.stat.st_size
+            removed.append(entry.path)
+            for url in self._digest_urls.pop(digest, ()):
+                del self._urls[url]
+        return removed
+
+    def _write_back(
+        self, removed: List[str], snapshot: Optional[Dict[str, object]] = None
+    ) -> asyncio.Task:
+        """
+        Delete evicted files, and save the index if given, in one thread hop.
+        The task is tracked so a download of the same image waits for it.
+        """
+        task = asyncio.ensure_future(asyncio.to_thread(self._sync, removed, snapshot))
+        self._removals.add(task)
+        task.add_done_callback(self._removals.discard)
+        return task
+
+    def _sync(self, removed: List[str], snapshot: Optional[Dict[str, object]]) -> None:
+        if snapshot is not None:
+            self._save_index(snapshot)
+        for path in removed:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _write_object(path: str, body: bytes) -> os.stat_result:
+        """Write atomically so a crashed write never leaves a truncated object"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as file:
+            file.write(body)
+        os.replace(tmp_path, path)
+        return os.stat(path)
+
+    def _snapshot(self) -> Dict[str, object]:
+        return {
+            "urls": dict(self._urls),
+            # Least recently served first, so a restart keeps the LRU order
+            "objects": [[e.digest, os.path.relpath(e.path, self.directory), e.media_type]
+                        for e in self._entries.values()],
+        }
+
+    def _save_index(self, snapshot: Dict[str, object]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "w") as file:
+            json.dump(snapshot, file)
+        os.replace(tmp_path, os.path.join(self.directory, self.INDEX_FILE))
+
+    async def _load(self) -> None:
+        """Restore the index from disk on first use, skipping objects that are gone"""
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            entries, urls = await asyncio.to_thread(self._read_index)
+            for entry in entries:
+                self._entries[entry.digest] = entry
+                self._size += entry.stat.st_size
+            for url, digest in urls.items():
+                if digest in self._entries:
+                    self._urls[url] = digest
+                    self._digest_urls.setdefault(digest, set()).add(url)
+            self._loaded = True
+            removed = self._evict()
+            if removed:
+                self._write_back(removed)
+
+    def _read_index(self) -> Tuple[List[CachedFlag], Dict[str, str]]:
+        try:
+            with open(os.path.join(self.directory, self.INDEX_FILE)) as file:
+                snapshot = json.load(file)
+        except (OSError, ValueError):
+            return [], {}
+
+        entries = []
+        for digest, relative_path, media_type in snapshot.get("objects", []):
+            path = os.path.join(self.directory, relative_path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append(CachedFlag(digest, path, media_type, stat))
+        return entries, snapshot.get("urls", {})
+
+class ZeroCopyFileResponse(FileResponse):
+    """
+    FileResponse that hands the open file to the server when it supports the
+    ASGI `http.response.zerocopy` extension (sendfile), and streams otherwise.
+    `on_close` runs once the response is finished, even if sending failed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        status_code: int = 200,
+        *,
+        on_close: Optional[Callable[[], None]] = None,
+        **kwargs
+    ):
+        super().__init__(path, status_code, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self._send(scope, receive, send)
+        finally:
+            if self.on_close is not None:
+                self.on_close()
+
+    async def _send(self, scope, receive, send) -> None:
+        if "http.response.zerocopy" not in scope.get("extensions", {}) or self.send_header_only:
+            await super().__call__(scope, receive, send)
+            return
+
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        with open(self.path, "rb") as file:
+            await send({
+                "type": "http.response.zerocopy",
+                "file": file,
+                "more_body": False,
+            })
+        if self.background is not None:
+            await self.background()
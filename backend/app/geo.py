@@ -0,0 +1,85 @@
+from typing import Dict, List, Tuple
+import numpy as np
+from .store import CountryStore
+
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine_km(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """Great-circle distances in km from one point to arrays of points, all in radians"""
+    dlat = lats - lat
+    dlng = lngs - lng
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+class GeoIndex:
+    """
+    Spatial and adjacency index over one CountryStore, built once per dataset.
+
+    Positions are stored as contiguous unit-sphere vectors, so a k-nearest
+    query is a single (n, 3) @ (3,) product plus a partial sort. Radius
+    queries prefilter with the same product and compute exact distances with
+    a vectorised haversine over precomputed radian columns.
+    Land borders are resolved from CCA3 codes to row indexes up front.
+    """
+
+    def __init__(self, store: CountryStore):
+        self.store = store
+        latitudes = np.frombuffer(store.latitudes, dtype=np.float64)
+        longitudes = np.frombuffer(store.longitudes, dtype=np.float64)
+
+        # Only rows with coordinates take part in spatial queries
+        self._rows = np.flatnonzero(np.isfinite(latitudes) & np.isfinite(longitudes))
+        self._lat = np.radians(latitudes[self._rows])
+        self._lng = np.radians(longitudes[self._rows])
+        cos_lat = np.cos(self._lat)
+        self._xyz = np.ascontiguousarray(
+            np.column_stack((cos_lat * np.cos(self._lng), cos_lat * np.sin(self._lng), np.sin(self._lat)))
+        )
+        self._position: Dict[int, int] = {int(row): i for i, row in enumerate(self._rows)}
+
+        by_cca3 = {code: row for row, code in enumerate(store.cca3_codes) if code}
+        self._neighbors: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(by_cca3[code] for code in codes if code in by_cca3)
+            for codes in store.borders
+        )
+
+    def neighbors(self, row: int) -> Tuple[int, ...]:
+        """Rows of the countries sharing a land border with `row`"""
+        return self._neighbors[row]
+
+    def nearest(self, row: int, k: int) -> List[Tuple[int, float]]:
+        """Up to `k` nearest other rows to `row` as (row, distance_km), nearest first"""
+        position = self._position.get(row)
+        if position is None or k <= 0:
+            return []
+
+        similarity = self._xyz @ self._xyz[position]
+        similarity[position] = -np.inf  # never return the country itself
+        k = min(k, len(similarity) - 1)
+        if k <= 0:
+            return []
+        candidates = np.argpartition(-similarity, k - 1)[:k]
+        candidates = candidates[np.argsort(-similarity[candidates])]
+        distances = haversine_km(
+            self._lat[position], self._lng[position], self._lat[candidates], self._lng[candidates]
+        )
+        return list(zip(self._rows[candidates].tolist(), distances.tolist()))
+
+    def within(self, row: int, radius_km: float) -> List[Tuple[int, float]]:
+        """Other rows within `radius_km` of `row` as (row, distance_km), nearest first"""
+        position = self._position.get(row)
+        if position is None:
+            return []
+
+        # Cheap prefilter on the unit vectors, then exact haversine on the survivors
+        min_similarity = np.cos(min(radius_km / EARTH_RADIUS_KM, np.pi)) - 1e-9
+        candidates = np.flatnonzero(self._xyz @ self._xyz[position] >= min_similarity)
+        candidates = candidates[candidates != position]
+
+        distances = haversine_km(
+            self._lat[position], self._lng[position], self._lat[candidates], self._lng[candidates]
+        )
+        keep = distances <= radius_km
+        candidates, distances = candidates[keep], distances[keep]
+        order = np.argsort(distances)
+        return list(zip(self._rows[candidates[order]].tolist(), distances[order].tolist()))
@@ -0,0 +1,185 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+# Per-request fields collected for the access log line (e.g. cache status).
+# The middleware installs a fresh dict per request; deeper layers only mutate it.
+_access_fields: ContextVar[Optional[Dict[str, Any]]] = ContextVar("access_fields", default=None)
+
+access_logger = logging.getLogger("app.access")
+
+# Listener of the queue handler currently installed by configure_logging
+_listener: Optional[logging.handlers.QueueListener] = None
+
+_STANDARD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+def note_access(**fields: Any) -> None:
+    """Attach fields to the access log line of the current request, if any"""
+    current = _access_fields.get()
+    if current is not None:
+        current.update(fields)
+
+class JsonFormatter(logging.Formatter):
+    """
+    Render records as single-line JSON.
+    Anything passed via `extra=` is emitted as a top-level field.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and key != "sample":
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep one in `every` records for high-volume lines.
+    Only records logged with `extra={"sample": True}` below ERROR are sampled,
+    counted per message template so unrelated lines do not share a budget.
+    """
+
+    def __init__(self, every: int = 100):
+        super().__init__()
+        self.every = max(1, every)
+        self._counts: Dict[Any, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.every == 1 or not getattr(record, "sample", False):
+            return True
+        if record.levelno >= logging.ERROR:
+            return True
+        key = (record.name, record.msg)
+        count = self._counts.get(key, 0)
+        self._counts[key] = count + 1
+        return count % self.every == 0
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that enqueues the record untouched.
+    The stock handler formats the message before enqueueing so records can be
+    pickled; the queue here is in-process, so formatting is left to the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+def configure_logging(
+    level: str = "INFO",
+    sample_every: int = 100,
+    handler: Optional[logging.Handler] = None,
+) -> logging.handlers.QueueListener:
+    """
+    Route all logging through an in-memory queue drained by a background thread.
+    Request handlers only pay for enqueueing a record; formatting and the write
+    itself happen on the listener thread.
+    """
+    if handler is None:
+        handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter())
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    # Sample before enqueueing so dropped records cost nothing downstream
+    queue_handler.addFilter(SamplingFilter(sample_every))
+
+    global _listener
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        if isinstance(existing, logging.handlers.QueueHandler):
+            root.removeHandler(existing)
+    # The replaced handler's thread drains what is left in its queue and exits
+    if _listener is not None:
+        _stop_listener(_listener)
+    else:
+        atexit.register(_stop_active_listener)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    _listener = listener
+    return listener
+
+def _stop_listener(listener: logging.handlers.QueueListener) -> None:
+    """Flush and stop a listener, tolerating one that was already stopped"""
+    if listener._thread is not None:
+        listener.stop()
+
+def _stop_active_listener() -> None:
+    if _listener is not None:
+        _stop_listener(_listener)
+
+class AccessLogMiddleware:
+    """
+    ASGI middleware emitting one structured access log line per request with
+    status, timing and whatever fields deeper layers added via `note_access`.
+    Successful responses are sampled; errors are always logged.
+    """
+
+    def __init__(self, app, sample_every: int = 1):
+        self.app = app
+        self.sample_every = max(1, sample_every)
+        self._seen = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        fields: Dict[str, Any] = {}
+        token = _access_fields.set(fields)
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _access_fields.reset(token)
+            self._log(scope, status, size, time.perf_counter() - start, fields)
+
+    def _log(self, scope, status: int, size: int, elapsed: float, fields: Dict[str, Any]) -> None:
+        if status < 400:
+            self._seen += 1
+            if (self._seen - 1) % self.sample_every:
+                return
+        if not access_logger.isEnabledFor(logging.INFO):
+            return
+        client = scope.get("client")
+        access_logger.info(
+            "%s %s %s",
+            scope["method"],
+            scope["path"],
+            status,
+            extra={
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "duration_ms": round(elapsed * 1000, 3),
+                "bytes": size,
+                "client": client[0] if client else None,
+                "cache": fields.pop("cache", None),
+                **fields,
+            },
+        )
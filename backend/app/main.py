@@ -1,24 +1,87 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
 import os
 import logging
+from .logging_config import AccessLogMiddleware, configure_logging
+from .admission import AdmissionControlMiddleware, AdmissionGate, ClientRateLimiter
+from .controllers import CountryController
 from .routes import router
 
-# Load environment variables
-load_dotenv()
+# Load environment variables from .env when python-dotenv is available
+try:
+    from dotenv import load_dotenv
+except ImportError:  # pragma: no cover - optional in slim images
+    pass
+else:
+    load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging: records are queued and written by a background thread
+configure_logging(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    sample_every=int(os.getenv("LOG_SAMPLE_EVERY", "100")),
+)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create app-wide singletons at startup rather than at import time"""
+    app.state.country_controller = CountryController()
+    service = app.state.country_controller.country_service
+    # Pack flags into the sprite atlas in the background after each dataset load
+    service.atlas_autobuild = os.getenv("FLAG_ATLAS_AUTOBUILD", "true").lower() == "true"
+    # Periodic health probes let demoted upstream sources recover early
+    probe_interval = float(os.getenv("UPSTREAM_PROBE_INTERVAL", "30"))
+    probes = (
+        asyncio.create_task(service.upstream.run_probes(probe_interval))
+        if probe_interval > 0 else None
+    )
+    # Scheduled reloads feed the /countries/changes stream
+    refresh_interval = float(os.getenv("COUNTRIES_REFRESH_INTERVAL", os.getenv("COUNTRIES_CACHE_TTL", "300")))
+    refresher = (
+        asyncio.create_task(service.run_refresh(refresh_interval))
+        if refresh_interval > 0 else None
+    )
+    yield
+    for task in (probes, refresher):
+        if task is not None:
+            task.cancel()
+
 app = FastAPI(
     title="Country API",
     description="A REST API for exploring country information using REST Countries data",
     version="1.0.0",
     openapi_version="3.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
+)
+
+# Configure admission control: cached listing reads and upstream-bound detail
+# lookups get separate concurrency budgets so one cannot starve the other.
+# Added before CORS so that shed responses still carry CORS headers.
+app.add_middleware(
+    AdmissionControlMiddleware,
+    gates={
+        "list": AdmissionGate(
+            "list",
+            max_concurrent=int(os.getenv("ADMISSION_LIST_CONCURRENCY", "64")),
+            max_queue=int(os.getenv("ADMISSION_LIST_QUEUE", "256")),
+            max_wait=float(os.getenv("ADMISSION_LIST_MAX_WAIT", "0.5")),
+        ),
+        "detail": AdmissionGate(
+            "detail",
+            max_concurrent=int(os.getenv("ADMISSION_DETAIL_CONCURRENCY", "16")),
+            max_queue=int(os.getenv("ADMISSION_DETAIL_QUEUE", "64")),
+            max_wait=float(os.getenv("ADMISSION_DETAIL_MAX_WAIT", "2.0")),
+        ),
+    },
+    rate_limiter=ClientRateLimiter(
+        rate=float(os.getenv("RATE_LIMIT_PER_SECOND", "20")),
+        burst=float(os.getenv("RATE_LIMIT_BURST", "40")),
+        max_clients=int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000")),
+    ),
 )
 
 # Configure CORS
@@ -34,6 +97,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Structured access log, outermost so timing includes admission queueing
+app.add_middleware(
+    AccessLogMiddleware,
+    sample_every=int(os.getenv("ACCESS_LOG_SAMPLE_EVERY", "1")),
+)
+
 # Include routes
 app.include_router(router, tags=["Countries"])
 
@@ -46,7 +115,9 @@ async def root():
         "docs": "/docs",
         "endpoints": {
             "countries": "/countries",
-            "country_details": "/countries/{name}"
+            "country_details": "/countries/{name}",
+            "country_changes": "/countries/changes",
+            "stats": "/stats"
         }
     }
 
@@ -1,12 +1,27 @@
 from pydantic import BaseModel
 from typing import Optional, List
 
+class SpriteOffset(BaseModel):
+    """Position of a country's flag thumbnail within the flag atlas at `atlas_url`"""
+    atlas_url: str
+    x: int
+    y: int
+    width: int
+    height: int
+    atlas_width: int
+    atlas_height: int
+
 class Country(BaseModel):
     """Basic country information for the countries list"""
     name: str
     flag: str
     population: int
     region: Optional[str] = None
+    sprite: Optional[SpriteOffset] = None
+
+class NearbyCountry(Country):
+    """Country with its great-circle distance from a reference country"""
+    distance_km: float
 
 class CountryDetails(BaseModel):
     """Detailed country information for individual country queries"""
@@ -21,4 +36,29 @@ class CountryDetails(BaseModel):
 class CountryListResponse(BaseModel):
     """Response model for countries list endpoint"""
     countries: List[Country]
-    total: int 
\ No newline at end of file
+    total: int
+
+class DensityPercentiles(BaseModel):
+    """Population density (people per km²) percentiles within a group"""
+    p10: Optional[float] = None
+    p25: Optional[float] = None
+    p50: Optional[float] = None
+    p75: Optional[float] = None
+    p90: Optional[float] = None
+
+class GroupStats(BaseModel):
+    """Aggregate statistics for one region or subregion"""
+    name: Optional[str] = None
+    region: Optional[str] = None
+    count: int
+    total_population: int
+    mean_population: float
+    median_population: float
+    total_area: float
+    density_percentiles: DensityPercentiles
+
+class StatsResponse(BaseModel):
+    """Response model for the statistics endpoint"""
+    version: str
+    regions: List[GroupStats]
+    subregions: List[GroupStats]
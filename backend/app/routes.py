@@ -1,11 +1,34 @@
-from fastapi import APIRouter, Path
-from typing import List
-from .models import Country, CountryDetails
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from .models import Country, CountryDetails, NearbyCountry, StatsResponse
 from .controllers import CountryController
+from .encoding import (
+    COLUMNAR_JSON,
+    COLUMNAR_MSGPACK,
+    MSGPACK,
+    negotiate,
+    supported_media_types,
+)
+from .flags import ZeroCopyFileResponse
+
+# Flag images and atlases by digest are content-addressed, so a given ETag never changes meaning
+FLAG_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# `/flags/atlas` always serves the current atlas, so clients revalidate it
+ATLAS_CACHE_CONTROL = "public, no-cache"
 
 router = APIRouter()
-# Initialize the controller
-country_controller = CountryController()
+
+def get_country_controller(request: Request) -> CountryController:
+    """
+    Dependency returning the app-wide controller.
+    It is created in the application lifespan; when the app runs without one
+    (e.g. a bare TestClient) it is created on first use instead.
+    """
+    controller = getattr(request.app.state, "country_controller", None)
+    if controller is None:
+        controller = request.app.state.country_controller = CountryController()
+    return controller
 
 @router.get(
     "/countries", 
@@ -21,19 +44,89 @@ country_controller = CountryController()
                         "type": "array",
                         "items": {"$ref": "#/components/schemas/Country"}
                     }
-                }
+                },
+                COLUMNAR_JSON: {
+                    "schema": {
+                        "type": "object",
+                        "description": "Parallel arrays per field: {count, columns: {field: [...]}}"
+                    }
+                },
+                MSGPACK: {"schema": {"type": "string", "format": "binary"}},
+                COLUMNAR_MSGPACK: {"schema": {"type": "string", "format": "binary"}}
             }
+        },
+        304: {
+            "description": "Not modified"
+        },
+        400: {
+            "description": "Unsupported language"
+        },
+        406: {
+            "description": "None of the requested media types is supported"
         }
     }
 )
-async def get_countries():
+async def get_countries(
+    request: Request,
+    lang: Optional[str] = Query(
+        None,
+        description="Return names in this language: an ISO 639-1 code (e.g. `de`) or a REST Countries translation key (e.g. `deu`)",
+        example="de"
+    ),
+    country_controller: CountryController = Depends(get_country_controller)
+):
     """
     HTTP route to retrieve all countries with basic information (name and flag).
     
     This route delegates to the CountryController for business logic.
-    Returns a list of countries from the REST Countries API.
+    Returns a list of countries from the REST Countries API, encoded according
+    to the `Accept` header (JSON by default, columnar JSON or MessagePack).
+    With `lang`, country names are localised; untranslated names stay in English.
+    """
+    supported = supported_media_types()
+    media_type = negotiate(request.headers.get("accept"), supported)
+    if media_type is None:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Supported media types: {', '.join(supported)}"
+        )
+    
+    body, etag = await country_controller.get_encoded_countries(media_type, lang)
+    headers = {"ETag": etag, "Vary": "Accept"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+@router.get(
+    "/countries/changes",
+    summary="Stream dataset changes",
+    description="Server-Sent Events: a `version` event on connect and on every dataset refresh, followed by a `delta` event with per-country changes",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "An event stream",
+            "content": {"text/event-stream": {"schema": {"type": "string"}}}
+        }
+    }
+)
+async def stream_country_changes(
+    last_event_id: Optional[str] = Header(None, description="Resume after this event id"),
+    country_controller: CountryController = Depends(get_country_controller)
+):
+    """
+    HTTP route streaming dataset changes as Server-Sent Events.
+    
+    This route delegates to the CountryController for business logic.
+    Clients resume with `Last-Event-ID` (sent automatically by EventSource);
+    when the change log no longer covers it a `reset` event tells them to
+    refetch `/countries`. Registered before `/countries/{name}`.
     """
-    return await country_controller.get_all_countries()
+    events = await country_controller.stream_changes(last_event_id)
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get(
     "/countries/{name}",
@@ -58,7 +151,8 @@ async def get_countries():
     }
 )
 async def get_country_details(
-    name: str = Path(..., description="Country name", example="france")
+    name: str = Path(..., description="Country name", example="france"),
+    country_controller: CountryController = Depends(get_country_controller)
 ):
     """
     HTTP route to retrieve detailed information about a specific country by name.
@@ -71,4 +165,192 @@ async def get_country_details(
     Returns:
         Detailed information about the country including population, capital, etc.
     """
-    return await country_controller.get_country_details(name) 
\ No newline at end of file
+    return await country_controller.get_country_details(name)
+
+@router.get(
+    "/countries/{name}/nearby",
+    response_model=List[NearbyCountry],
+    summary="Retrieve the countries nearest to a country",
+    description="Countries ordered by great-circle distance between their reference coordinates",
+    responses={
+        404: {
+            "description": "Country not found"
+        }
+    }
+)
+async def get_nearby_countries(
+    name: str = Path(..., description="Country name", example="france"),
+    k: int = Query(5, ge=1, le=250, description="Maximum number of countries to return"),
+    radius_km: Optional[float] = Query(
+        None, gt=0, description="Only return countries within this distance in km"
+    ),
+    country_controller: CountryController = Depends(get_country_controller)
+):
+    """
+    HTTP route to retrieve the countries nearest to a given country.
+    
+    This route delegates to the CountryController for business logic.
+    Answered from a spatial index built when the dataset loads.
+    """
+    return await country_controller.get_nearby_countries(name, k, radius_km)
+
+@router.get(
+    "/countries/{name}/neighbors",
+    response_model=List[Country],
+    summary="Retrieve the countries bordering a country",
+    description="Countries sharing a land border with the given country",
+    responses={
+        404: {
+            "description": "Country not found"
+        }
+    }
+)
+async def get_country_neighbors(
+    name: str = Path(..., description="Country name", example="france"),
+    country_controller: CountryController = Depends(get_country_controller)
+):
+    """
+    HTTP route to retrieve the countries sharing a land border with a given country.
+    
+    This route delegates to the CountryController for business logic.
+    Answered from a border map built when the dataset loads.
+    """
+    return await country_controller.get_country_neighbors(name)
+
+@router.get(
+    "/stats",
+    response_model=StatsResponse,
+    summary="Aggregate statistics by region and subregion",
+    description="Country count, population totals, mean and median, total area and population density percentiles per region and subregion"
+)
+async def get_stats(
+    country_controller: CountryController = Depends(get_country_controller)
+):
+    """
+    HTTP route to retrieve aggregate statistics over the loaded dataset.
+    
+    This route delegates to the CountryController for business logic.
+    Statistics are computed once per dataset version.
+    """
+    return await country_controller.get_stats()
+
+@router.get(
+    "/flags/atlas",
+    summary="Retrieve the flag atlas",
+    description="A single PNG holding a thumbnail of every flag; `/countries` entries carry their `sprite` offsets into it",
+    response_class=ZeroCopyFileResponse,
+    responses={
+        200: {
+            "description": "The flag atlas",
+            "content": {"image/png": {"schema": {"type": "string", "format": "binary"}}}
+        },
+        304: {
+            "description": "Not modified"
+        },
+        502: {
+            "description": "The atlas could not be built"
+        }
+    }
+)
+async def get_flag_atlas(
+    request: Request,
+    country_controller: CountryController = Depends(get_country_controller)
+):
+    """
+    HTTP route to retrieve the flag sprite atlas.
+    
+    This route delegates to the CountryController for business logic.
+    Lets the country grid load every flag with a single image request.
+    Registered before `/flags/{code}` so that `atlas` is not taken for a code.
+    """
+    atlas = await country_controller.get_flag_atlas()
+    etag = f'"{atlas.digest}"'
+    headers = {"ETag": etag, "Cache-Control": ATLAS_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return ZeroCopyFileResponse(atlas.path, media_type="image/png", headers=headers)
+
+@router.get(
+    "/flags/atlas/{digest}.png",
+    summary="Retrieve a flag atlas by content hash",
+    description="The atlas a `sprite.atlas_url` points to; sprite offsets are only valid for that atlas",
+    response_class=ZeroCopyFileResponse,
+    responses={
+        200: {
+            "description": "The flag atlas",
+            "content": {"image/png": {"schema": {"type": "string", "format": "binary"}}}
+        },
+        304: {
+            "description": "Not modified"
+        },
+        404: {
+            "description": "Not the current atlas"
+        },
+        502: {
+            "description": "The atlas could not be built"
+        }
+    }
+)
+async def get_flag_atlas_by_digest(
+    request: Request,
+    digest: str = Path(..., description="SHA-256 of the atlas image"),
+    country_controller: CountryController = Depends(get_country_controller)
+):
+    """
+    HTTP route to retrieve the flag sprite atlas by its content hash.
+    
+    This route delegates to the CountryController for business logic.
+    The URL changes whenever the atlas does, so it is cached as immutable;
+    a superseded atlas is answered with 404.
+    """
+    atlas = await country_controller.get_flag_atlas(digest)
+    etag = f'"{atlas.digest}"'
+    headers = {"ETag": etag, "Cache-Control": FLAG_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return ZeroCopyFileResponse(atlas.path, media_type="image/png", headers=headers)
+
+@router.get(
+    "/flags/{code}",
+    summary="Retrieve a country's flag image",
+    description="The flag image, proxied from the upstream source and cached on disk",
+    response_class=ZeroCopyFileResponse,
+    responses={
+        200: {
+            "description": "The flag image",
+            "content": {"image/png": {"schema": {"type": "string", "format": "binary"}}}
+        },
+        304: {
+            "description": "Not modified"
+        },
+        400: {
+            "description": "Invalid country code"
+        },
+        404: {
+            "description": "Country not found"
+        }
+    }
+)
+async def get_flag(
+    request: Request,
+    code: str = Path(..., description="ISO 3166-1 alpha-2 or alpha-3 country code", example="fr"),
+    country_controller: CountryController = Depends(get_country_controller)
+):
+    """
+    HTTP route to retrieve a country's flag image by country code.
+    
+    This route delegates to the CountryController for business logic.
+    Images are fetched upstream once, stored by content hash and served
+    straight from disk with a strong ETag and immutable caching.
+    """
+    flag = await country_controller.get_flag(code)
+    etag = f'"{flag.digest}"'
+    headers = {"ETag": etag, "Cache-Control": FLAG_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        country_controller.release_flag(flag)
+        return Response(status_code=304, headers=headers)
+    # The file stays pinned in the cache until the body has been sent
+    return ZeroCopyFileResponse(
+        flag.path, media_type=flag.media_type, headers=headers, stat_result=flag.stat,
+        on_close=lambda: country_controller.release_flag(flag)
+    )
@@ -1,113 +1,458 @@
-import httpx
-from typing import List, Optional
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple
 from fastapi import HTTPException
+import asyncio
 import logging
-from .models import Country, CountryDetails
+import os
+import tempfile
+import time
+from .changes import ChangeFeed, diff_stores
+from .encoding import JSON, EncodedPayloadCache
+from .flags import CachedFlag, FlagCache
+from .logging_config import note_access
+from .models import Country, CountryDetails, NearbyCountry, SpriteOffset, StatsResponse
+from .store import CountryStore
+from .upstream import BundledSource, UpstreamPool, UpstreamSource
+
+if TYPE_CHECKING:
+    from .geo import GeoIndex
+    from .sprites import SpriteAtlas
 
 logger = logging.getLogger(__name__)
 
 class CountryService:
     """Service layer for country operations"""
     
-    def __init__(self):
-        self.base_url = "https://restcountries.com/v3.1"
-        self.timeout = 30.0
+    def __init__(self, upstream: Optional[UpstreamPool] = None):
+        self.timeout = float(os.getenv("COUNTRIES_API_TIMEOUT", "10"))
+        # Primary, mirrors and the bundled dataset, tried in health and latency order
+        self.upstream = upstream or UpstreamPool.from_env(self.timeout)
+        self.cache_ttl = float(os.getenv("COUNTRIES_CACHE_TTL", "300"))
+        self._store_ttl = self.cache_ttl
+        self._store: Optional[CountryStore] = None
+        self._countries: Optional[List[Country]] = None
+        # Encoded /countries bodies for the current dataset, per format and language
+        self.encoded_countries = EncodedPayloadCache()
+        self._stats: Optional[StatsResponse] = None
+        self._geo: Optional["GeoIndex"] = None
+        self._loaded_at = 0.0
+        # In-flight dataset load shared by every concurrent miss
+        self._loading: Optional[asyncio.Task] = None
+        self.flag_cache = FlagCache(
+            os.getenv("FLAG_CACHE_DIR", os.path.join(tempfile.gettempdir(), "flag-explorer-flags")),
+            int(os.getenv("FLAG_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        )
+        self._atlas: Optional["SpriteAtlas"] = None
+        self._atlas_task: Optional[asyncio.Task] = None
+        self._atlas_task_version: Optional[str] = None
+        # Build the flag atlas in the background whenever a new dataset loads
+        self.atlas_autobuild = False
+        # An atlas with missing flags is rebuilt after this delay, doubling per attempt
+        self.atlas_retry = float(os.getenv("FLAG_ATLAS_RETRY_SECONDS", "30"))
+        self.atlas_max_retry = 600.0
+        self._atlas_attempts = 0
+        self.changes = ChangeFeed(max_events=int(os.getenv("CHANGES_LOG_SIZE", "1000")))
     
-    async def get_all_countries(self) -> List[Country]:
-        """Retrieve all countries with basic information"""
+    def _cache_is_fresh(self) -> bool:
+        """Whether the loaded dataset is still within its TTL"""
+        return (
+            self._store is not None
+            and time.monotonic() - self._loaded_at < self._store_ttl
+        )
+    
+    async def get_store(self, force: bool = False) -> CountryStore:
+        """Retrieve the full country dataset, fetching it when missing, stale or forced"""
+        if not force and self._cache_is_fresh():
+            note_access(cache="hit")
+            return self._store
+        note_access(cache="miss")
+        
+        # Concurrent misses (cold start, TTL expiry) wait for one upstream fetch
+        task = self._loading
+        if task is None:
+            task = asyncio.ensure_future(self._load_store())
+            self._loading = task
+            task.add_done_callback(self._load_done)
+        # Shielded: a disconnecting client must not cancel the shared load
+        store, source = await asyncio.shield(task)
+        note_access(upstream=source.name)
+        return store
+    
+    def _load_done(self, task: asyncio.Task) -> None:
+        if self._loading is task:
+            self._loading = None
+        if not task.cancelled():
+            task.exception()  # Retrieved here so a load nobody awaits is not reported
+    
+    async def _load_store(self) -> Tuple[CountryStore, UpstreamSource]:
+        """Fetch the dataset from the upstream pool and rebuild everything derived from it"""
+        # Deferred import: httpx costs ~200ms at startup and is only needed on misses
+        import httpx
+        
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(f"{self.base_url}/all")
-                response.raise_for_status()
-                
-            countries_data = response.json()
-            countries = []
+            countries_data, source = await self.upstream.get_countries()
             
-            for country_data in countries_data:
-                try:
-                    # Extract basic country information as per Swagger spec
-                    name = country_data.get("name", {}).get("common", "Unknown")
-                    flag = country_data.get("flags", {}).get("png", "")
-                    population = country_data.get("population", 0)
-                    region = country_data.get("region")
-                    
-                    if name != "Unknown" and flag:  # Only include countries with valid data
-                        country = Country(
-                            name=name, 
-                            flag=flag,
-                            population=population,
-                            region=region
-                        )
-                        countries.append(country)
-                except Exception as e:
-                    logger.warning(f"Error processing country data: {e}")
-                    continue
-            
-            return countries
+            store = CountryStore.from_restcountries(countries_data)
             
         except httpx.TimeoutException:
             logger.error("Timeout while fetching countries")
             raise HTTPException(status_code=504, detail="Service timeout while fetching countries")
         except httpx.HTTPError as e:
-            logger.error(f"HTTP error while fetching countries: {e}")
+            logger.error("HTTP error while fetching countries: %s", e)
             raise HTTPException(status_code=502, detail="Error fetching countries from external service")
         except Exception as e:
-            logger.error(f"Unexpected error while fetching countries: {e}")
+            logger.error("Unexpected error while fetching countries: %s", e)
             raise HTTPException(status_code=500, detail="Internal server error")
+        
+        previous, self._store = self._store, store
+        if previous is None or previous.version != store.version:
+            self.changes.publish(store.version, diff_stores(previous, store) if previous else None)
+        # Bodies for every language are encoded up front so `lang` costs nothing per request
+        self._render_countries(store)
+        self._geo = self._build_geo_index(store)
+        self._loaded_at = time.monotonic()
+        # Fallback data is only kept until the live sources are worth retrying
+        self._store_ttl = (
+            min(self.cache_ttl, self.upstream.cooldown)
+            if isinstance(source, BundledSource) else self.cache_ttl
+        )
+        return store, source
+    
+    async def run_refresh(self, interval: float) -> None:
+        """
+        Reload the dataset every `interval` seconds once it has been loaded,
+        so change subscribers hear about updates without anyone polling.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            if self._store is None:
+                continue
+            try:
+                await self.get_store(force=True)
+            except HTTPException as e:
+                logger.warning("Scheduled dataset refresh failed: %s", e.detail)
+    
+    async def get_changes(self, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """Stream dataset change events, starting from the current dataset"""
+        await self.get_store()
+        return self.changes.stream(last_event_id)
+    
+    @staticmethod
+    def _build_geo_index(store: CountryStore) -> "GeoIndex":
+        """Build the spatial and border index for a freshly loaded dataset"""
+        # Deferred import: keeps numpy out of application startup
+        from .geo import GeoIndex
+        return GeoIndex(store)
+    
+    async def get_geo_index(self) -> "GeoIndex":
+        """Retrieve the spatial and border index for the current dataset"""
+        store = await self.get_store()
+        if self._geo is None or self._geo.store is not store:
+            self._geo = self._build_geo_index(store)
+        return self._geo
+    
+    async def get_all_countries(self) -> List[Country]:
+        """Retrieve all countries with basic information"""
+        return self._countries_for(await self.get_store())
+    
+    def _countries_for(self, store: CountryStore) -> List[Country]:
+        """API models for `store`, scheduling its flag atlas if enabled"""
+        if self.atlas_autobuild:
+            self._schedule_atlas(store)
+        if self._countries is not None and self._store is store:
+            return self._countries
+        countries = store.countries(self._sprite_offsets(store))
+        # API models are built once per loaded dataset, not once per request
+        if self._store is store:
+            self._countries = countries
+        return countries
+    
+    async def get_encoded_countries(self, media_type: str, lang: Optional[str] = None) -> Tuple[bytes, str]:
+        """
+        Retrieve the encoded countries list and its ETag, with names in `lang` if given.
+        Each format and language is encoded once per loaded dataset.
+        """
+        if lang is None:
+            return self.encoded_countries.get(await self.get_all_countries(), media_type)
+        # One store for both, so localised names always line up with the rows
+        store = await self.get_store()
+        language = self._resolve_language(store, lang)
+        countries = self._countries_for(store)
+        names = store.localised_names(language) if language else None
+        return self.encoded_countries.get(countries, media_type, language, names)
+    
+    def _render_countries(self, store: CountryStore) -> None:
+        """Build the API models and encode the default /countries body in every language"""
+        self._countries = store.countries(self._sprite_offsets(store))
+        self.encoded_countries.get(self._countries, JSON)
+        for language in store.languages:
+            self.encoded_countries.get(self._countries, JSON, language, store.localised_names(language))
+    
+    @staticmethod
+    def _resolve_language(store: CountryStore, lang: Optional[str]) -> Optional[str]:
+        """Translation key for a requested language; None means English"""
+        if lang is None or lang.strip().lower() in ("en", "eng"):
+            return None
+        language = store.resolve_language(lang)
+        if language is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported language '{lang}'. Supported: en, {', '.join(store.languages)}"
+            )
+        return language
+    
+    def _sprite_offsets(self, store: CountryStore) -> Optional[Dict[int, SpriteOffset]]:
+        """Atlas offsets by row, once the atlas for this dataset has been built"""
+        atlas = self._atlas
+        if atlas is None or atlas.version != store.version:
+            return None
+        return {
+            row: SpriteOffset(
+                atlas_url=f"/flags/atlas/{atlas.digest}.png",
+                x=x, y=y, width=atlas.tile_width, height=atlas.tile_height,
+                atlas_width=atlas.width, atlas_height=atlas.height
+            )
+            for row, (x, y) in atlas.offsets.items()
+        }
+    
+    async def get_atlas(self, digest: Optional[str] = None) -> "SpriteAtlas":
+        """
+        Retrieve the flag atlas for the current dataset, building it if needed.
+        With `digest`, only that atlas is returned: sprite offsets are only
+        valid for the atlas they were computed from.
+        """
+        if digest is not None and self._atlas is not None and self._atlas.digest == digest:
+            return self._atlas
+        store = await self.get_store()
+        task = self._schedule_atlas(store)
+        # Shielded: a disconnecting client must not cancel the shared build
+        atlas = self._atlas if task is None else await asyncio.shield(task)
+        if digest is not None and atlas.digest != digest:
+            raise HTTPException(
+                status_code=404,
+                detail="Flag atlas not found"
+            )
+        return atlas
+    
+    def _schedule_atlas(self, store: CountryStore, retry: bool = False) -> Optional[asyncio.Task]:
+        """
+        Start building the atlas for `store` unless it is built or in progress.
+        An incomplete atlas is only rebuilt on `retry`.
+        """
+        atlas = self._atlas
+        if atlas is not None and atlas.version == store.version and (atlas.complete or not retry):
+            return None
+        task = self._atlas_task
+        if task is None or self._atlas_task_version != store.version:
+            task = asyncio.ensure_future(self._build_atlas(store))
+            task.add_done_callback(self._atlas_done)
+            self._atlas_task = task
+            self._atlas_task_version = store.version
+        return task
+    
+    def _atlas_done(self, task: asyncio.Task) -> None:
+        if self._atlas_task is task:
+            self._atlas_task = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Flag atlas build failed: %s", task.exception())
+    
+    def _retry_atlas(self, store: CountryStore) -> None:
+        if self._store is not None and self._store.version != store.version:
+            return  # The dataset moved on; its own atlas build has been scheduled
+        self._schedule_atlas(store, retry=True)
+    
+    async def _build_atlas(self, store: CountryStore) -> "SpriteAtlas":
+        """Fetch every flag into the flag cache and pack them into one atlas"""
+        # Deferred import: the atlas pipeline pulls in Pillow
+        from .sprites import build_atlas, load_atlas, remove_stale_atlases
+        
+        directory = os.path.join(self.flag_cache.directory, "atlas")
+        atlas = await asyncio.to_thread(load_atlas, directory, store.version, len(store))
+        if atlas is None:
+            limit = asyncio.Semaphore(16)
+            pinned: List[str] = []
+            
+            async def fetch(url: str) -> Optional[str]:
+                async with limit:
+                    try:
+                        flag = await self.flag_cache.get(url, pin=True)
+                    except Exception as e:
+                        logger.warning("Flag %s left out of atlas: %s", url, e, extra={"sample": True})
+                        return None
+                    pinned.append(flag.digest)
+                    return flag.path
+            
+            try:
+                paths = await asyncio.gather(*[fetch(record.flag) for record in store])
+                atlas = await asyncio.to_thread(build_atlas, paths, directory, store.version)
+            finally:
+                # Pinned so eviction cannot remove files the workers are reading
+                for digest in pinned:
+                    self.flag_cache.release(digest)
+        
+        current = self._store is None or self._store.version == store.version
+        if atlas.complete:
+            self._atlas_attempts = 0
+            if current:
+                await asyncio.to_thread(remove_stale_atlases, directory, store.version)
+        else:
+            # Served as is meanwhile, but never persisted as this version's atlas
+            self._atlas_attempts += 1
+            delay = min(self.atlas_retry * 2 ** (self._atlas_attempts - 1), self.atlas_max_retry)
+            logger.warning(
+                "Flag atlas %s is missing %d flags, retrying in %.0fs",
+                store.version, atlas.rows - len(atlas.offsets), delay
+            )
+            asyncio.get_running_loop().call_later(delay, self._retry_atlas, store)
+        
+        # Offsets are only attached while the atlas version matches the dataset
+        if current:
+            self._atlas = atlas
+            # Re-rendered so the list and its encodings carry sprite offsets
+            self._render_countries(store)
+        return atlas
+    
+    async def get_stats(self) -> StatsResponse:
+        """Retrieve aggregate statistics by region and subregion"""
+        store = await self.get_store()
+        # Computed once per dataset version
+        if self._stats is None or self._stats.version != store.version:
+            # Deferred import: numpy is only needed once statistics are requested
+            from .stats import compute_stats
+            self._stats = StatsResponse(**compute_stats(store))
+        return self._stats
+    
+    async def get_nearby_countries(
+        self, country_name: str, k: int, radius_km: Optional[float] = None
+    ) -> List[NearbyCountry]:
+        """Retrieve the nearest countries to a country, optionally within a radius"""
+        geo = await self.get_geo_index()
+        record = geo.store.find(country_name)
+        if record is None:
+            raise HTTPException(status_code=404, detail=f"Country '{country_name}' not found")
+        
+        if radius_km is None:
+            matches = geo.nearest(record.index, k)
+        else:
+            matches = geo.within(record.index, radius_km)[:k]
+        
+        nearby = []
+        for row, distance in matches:
+            other = geo.store[row]
+            nearby.append(NearbyCountry(
+                name=other.name,
+                flag=other.flag,
+                population=other.population,
+                region=other.region,
+                distance_km=round(distance, 1)
+            ))
+        return nearby
+    
+    async def get_country_neighbors(self, country_name: str) -> List[Country]:
+        """Retrieve the countries sharing a land border with a country"""
+        geo = await self.get_geo_index()
+        record = geo.store.find(country_name)
+        if record is None:
+            raise HTTPException(status_code=404, detail=f"Country '{country_name}' not found")
+        
+        return [geo.store[row].to_country() for row in geo.neighbors(record.index)]
+    
+    async def get_flag(self, code: str) -> CachedFlag:
+        """
+        Retrieve a country's flag image from the on-disk cache, fetching it on a miss.
+        The image stays pinned in the cache until `release_flag` is called.
+        """
+        store = await self.get_store()
+        record = store.find_code(code)
+        if record is None:
+            raise HTTPException(status_code=404, detail=f"Country code '{code}' not found")
+        import httpx
+        
+        try:
+            return await self.flag_cache.get(record.flag, pin=True)
+        except httpx.TimeoutException:
+            logger.error("Timeout while fetching flag: %s", record.flag)
+            raise HTTPException(status_code=504, detail="Service timeout while fetching flag")
+        except httpx.HTTPError as e:
+            logger.error("HTTP error while fetching flag %s: %s", record.flag, e)
+            raise HTTPException(status_code=502, detail="Error fetching flag from external service")
+    
+    def release_flag(self, flag: CachedFlag) -> None:
+        """Let the flag cache evict an image once it has been served"""
+        self.flag_cache.release(flag.digest)
     
     async def get_country_by_name(self, country_name: str) -> CountryDetails:
         """Retrieve detailed information about a specific country"""
+        # Serve from the cached listing when possible, only misses go upstream.
+        # The listing also resolves names in every translation language.
+        if self._cache_is_fresh():
+            record = self._store.find(country_name)
+            if record is not None:
+                note_access(cache="hit")
+                return record.to_details()
+        note_access(cache="miss")
+        import httpx
+        
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                # Use name endpoint for exact matching
-                response = await client.get(f"{self.base_url}/name/{country_name}?fullText=true")
-                response.raise_for_status()
-            
-            countries_data = response.json()
+            # Use name endpoint for exact matching
+            countries_data, source = await self.upstream.get_json(f"/name/{country_name}?fullText=true")
+            note_access(upstream=source.name)
             
             if not countries_data:
-                raise HTTPException(status_code=404, detail=f"Country '{country_name}' not found")
+                return await self._find_translated(country_name)
             
             country_data = countries_data[0]  # Take the first match
             
-            # Extract detailed country information as per Swagger spec
-            name = country_data.get("name", {}).get("common", "Unknown")
-            population = country_data.get("population", 0)
-            capital = None
-            if country_data.get("capital") and len(country_data.get("capital", [])) > 0:
-                capital = country_data.get("capital")[0]
-            
-            flag = country_data.get("flags", {}).get("png", "")
-            region = country_data.get("region")
-            area = country_data.get("area")
-            code = country_data.get("cca2")
-            
-            country_details = CountryDetails(
-                name=name,
-                population=population,
-                capital=capital,
-                flag=flag,
-                region=region,
-                area=area,
-                code=code
-            )
-            
-            return country_details
+            return self._build_details(country_data)
             
         except HTTPException:
             # Re-raise HTTPExceptions (like 404) without modification
             raise
         except httpx.TimeoutException:
-            logger.error(f"Timeout while fetching country: {country_name}")
+            logger.error("Timeout while fetching country: %s", country_name)
             raise HTTPException(status_code=504, detail="Service timeout while fetching country details")
         except httpx.HTTPError as e:
-            if e.response and e.response.status_code == 404:
-                raise HTTPException(status_code=404, detail=f"Country '{country_name}' not found")
-            logger.error(f"HTTP error while fetching country {country_name}: {e}")
+            response = getattr(e, "response", None)
+            if response is not None and response.status_code == 404:
+                return await self._find_translated(country_name)
+            logger.error("HTTP error while fetching country %s: %s", country_name, e)
             raise HTTPException(status_code=502, detail="Error fetching country details from external service")
         except HTTPException:
             # Re-raise HTTPExceptions without modification
             raise
         except Exception as e:
-            logger.error(f"Unexpected error while fetching country {country_name}: {e}")
-            raise HTTPException(status_code=500, detail="Internal server error") 
\ No newline at end of file
+            logger.error("Unexpected error while fetching country %s: %s", country_name, e)
+            raise HTTPException(status_code=500, detail="Internal server error") 
+    
+    async def _find_translated(self, country_name: str) -> CountryDetails:
+        """
+        Resolve a name the upstream name search did not know (it matches English
+        only) against the dataset's translation index, loading the dataset once
+        if needed
+        """
+        try:
+            store = await self.get_store()
+        except HTTPException:
+            store = None
+        record = store.find(country_name) if store is not None else None
+        if record is None:
+            raise HTTPException(status_code=404, detail=f"Country '{country_name}' not found")
+        return record.to_details()
+    
+    @staticmethod
+    def _build_details(country_data: dict) -> CountryDetails:
+        """Extract detailed country information as per Swagger spec"""
+        name = country_data.get("name", {}).get("common", "Unknown")
+        population = country_data.get("population", 0)
+        capital = None
+        if country_data.get("capital") and len(country_data.get("capital", [])) > 0:
+            capital = country_data.get("capital")[0]
+        
+        return CountryDetails(
+            name=name,
+            population=population,
+            capital=capital,
+            flag=country_data.get("flags", {}).get("png", ""),
+            region=country_data.get("region"),
+            area=country_data.get("area"),
+            code=country_data.get("cca2")
+        )
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import math
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Thumbnails match the 3:2 flag cards on the home page
+TILE_WIDTH = 96
+TILE_HEIGHT = 64
+COLUMNS = 16
+
+class SpriteAtlas(NamedTuple):
+    """A built flag atlas: one PNG plus the tile position of each packed row"""
+    version: str
+    path: str
+    digest: str
+    width: int
+    height: int
+    tile_width: int
+    tile_height: int
+    offsets: Dict[int, Tuple[int, int]]
+    rows: int
+
+    @property
+    def complete(self) -> bool:
+        """Whether every dataset row got a tile"""
+        return len(self.offsets) == self.rows
+
+def _thumbnail(args: Tuple[Optional[str], int, int]) -> Optional[bytes]:
+    """Decode one flag and crop-resize it to a tile; runs in a worker process"""
+    path, width, height = args
+    if path is None:
+        return None
+    # Deferred import: Pillow is only loaded by atlas workers
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(path) as image:
+            tile = ImageOps.fit(image.convert("RGBA"), (width, height), Image.LANCZOS)
+    except Exception:
+        return None
+    return tile.tobytes()
+
+def build_atlas(
+    paths: Sequence[Optional[str]],
+    directory: str,
+    version: str,
+    tile_width: int = TILE_WIDTH,
+    tile_height: int = TILE_HEIGHT,
+    columns: int = COLUMNS,
+    workers: Optional[int] = None,
+) -> SpriteAtlas:
+    """
+    Pack the flag images at `paths` (one per dataset row, None when missing)
+    into a single PNG under `directory`, with an offsets map beside it.
+    Images are decoded and resized in a process pool; rows whose image is
+    missing or unreadable get no tile. Only a complete atlas is saved under
+    its final name for `load_atlas`; an incomplete one is written as
+    `<version>.<digest>.partial.png` so it can be served but is never reused,
+    and a retry never overwrites a partial atlas that is still being served.
+    Blocking: call it off the event loop.
+    """
+    from PIL import Image
+
+    workers = workers or min(4, os.cpu_count() or 1)
+    jobs = [(path, tile_width, tile_height) for path in paths]
+    # Spawned workers do not inherit the server's threads and locks
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        tiles = list(pool.map(_thumbnail, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+    packed = [row for row, tile in enumerate(tiles) if tile is not None]
+    rows = max(1, math.ceil(len(packed) / columns))
+    width = tile_width * min(columns, max(1, len(packed)))
+    height = tile_height * rows
+
+    atlas = Image.new("RGBA", (width, height))
+    offsets: Dict[int, Tuple[int, int]] = {}
+    for slot, row in enumerate(packed):
+        x, y = (slot % columns) * tile_width, (slot // columns) * tile_height
+        atlas.paste(Image.frombytes("RGBA", (tile_width, tile_height), tiles[row]), (x, y))
+        offsets[row] = (x, y)
+
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    with os.fdopen(fd, "wb") as file:
+        atlas.save(file, format="PNG", optimize=True)
+    with open(tmp_path, "rb") as file:
+        digest = hashlib.sha256(file.read()).hexdigest()
+    complete = len(offsets) == len(paths)
+    name = f"{version}.png" if complete else f"{version}.{digest[:16]}.partial.png"
+    path = os.path.join(directory, name)
+    os.replace(tmp_path, path)
+
+    result = SpriteAtlas(
+        version, path, digest, width, height, tile_width, tile_height, offsets, len(paths)
+    )
+    if complete:
+        _save_offsets(directory, result)
+    logger.info("Built flag atlas %s: %d of %d flags", version, len(offsets), len(paths))
+    return result
+
+def _save_offsets(directory: str, atlas: SpriteAtlas) -> None:
+    payload = {
+        "version": atlas.version,
+        "digest": atlas.digest,
+        "width": atlas.width,
+        "height": atlas.height,
+        "tile_width": atlas.tile_width,
+        "tile_height": atlas.tile_height,
+        "offsets": {str(row): list(offset) for row, offset in atlas.offsets.items()},
+        "rows": atlas.rows,
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    with os.fdopen(fd, "w") as file:
+        json.dump(payload, file)
+    os.replace(tmp_path, os.path.join(directory, f"{atlas.version}.json"))
+
+def load_atlas(directory: str, version: str, rows: Optional[int] = None) -> Optional[SpriteAtlas]:
+    """
+    Load the complete atlas previously built for `version` (of a dataset
+    with `rows` rows, when given), or None if there is none
+    """
+    path = os.path.join(directory, f"{version}.png")
+    try:
+        with open(os.path.join(directory, f"{version}.json")) as file:
+            payload = json.load(file)
+        if not os.path.exists(path):
+            return None
+        atlas = SpriteAtlas(
+            version, path, payload["digest"], payload["width"], payload["height"],
+            payload["tile_width"], payload["tile_height"],
+            {int(row): tuple(offset) for row, offset in payload["offsets"].items()},
+            payload.get("rows", rows),
+        )
+    except (OSError, ValueError, KeyError):
+        return None
+    # Atlases saved with missing tiles by older builds are rebuilt, not reused
+    if atlas.rows is None or (rows is not None and atlas.rows != rows) or not atlas.complete:
+        return None
+    return atlas
+
+def remove_stale_atlases(directory: str, version: str) -> None:
+    """Delete the atlas files of every other version, and partial builds of this one"""
+    keep = {f"{version}.png", f"{version}.json"}
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        if name.endswith((".png", ".json")) and name not in keep:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
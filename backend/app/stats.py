@@ -0,0 +1,111 @@
+from typing import Dict, List, Sequence
+import numpy as np
+from .store import CountryStore
+
+DENSITY_PERCENTILES = (10, 25, 50, 75, 90)
+
+def group_order(codes: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """
+    Indexes sorting rows by (group, value).
+    Sorts by value once, then stable-sorts the small group codes, which numpy
+    does with a radix sort when they fit in 16 bits; much faster than lexsort.
+    """
+    order = np.argsort(values)
+    code_type = np.int16 if n_groups < 2 ** 15 else np.int32
+    return order[np.argsort(codes[order].astype(code_type), kind="stable")]
+
+def grouped_quantiles(
+    codes: np.ndarray,
+    values: np.ndarray,
+    n_groups: int,
+    quantiles: Sequence[float],
+) -> np.ndarray:
+    """
+    Per-group quantiles with linear interpolation, without a Python loop per row.
+    Sorts once by (group, value) and indexes each group's slice directly.
+    Returns an (n_groups, len(quantiles)) array, NaN for empty groups.
+    """
+    result = np.full((n_groups, len(quantiles)), np.nan)
+    if len(values) == 0:
+        return result
+
+    sorted_values = values[group_order(codes, values, n_groups)].astype(np.float64)
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    positions = (counts[:, None] - 1) * np.asarray(quantiles, dtype=np.float64)[None, :]
+    positions = np.maximum(positions, 0)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.ceil(positions).astype(np.int64)
+    last = len(sorted_values) - 1
+    low_values = sorted_values[np.minimum(starts[:, None] + lower, last)]
+    high_values = sorted_values[np.minimum(starts[:, None] + upper, last)]
+
+    present = counts > 0
+    result[present] = (low_values + (high_values - low_values) * (positions - lower))[present]
+    return result
+
+def group_stats(store: CountryStore, column: str) -> List[Dict]:
+    """Aggregate population, area and density statistics grouped by `column`"""
+    labels, code_view = store.categorical(column)
+    if not labels:
+        return []
+    n_groups = len(labels)
+    codes = np.frombuffer(code_view, dtype=np.int32)
+    populations = np.frombuffer(store.populations, dtype=np.int64)
+    areas = np.frombuffer(store.areas, dtype=np.float64)
+
+    # Every label comes from the data, so each group has at least one row.
+    # float64 sums are exact up to 2**53, far above any population total.
+    counts = np.bincount(codes, minlength=n_groups)
+    total_population = np.bincount(codes, weights=populations, minlength=n_groups)
+    median_population = grouped_quantiles(codes, populations, n_groups, (0.5,))[:, 0]
+
+    known_area = np.isfinite(areas)
+    total_area = np.bincount(codes[known_area], weights=areas[known_area], minlength=n_groups)
+
+    has_density = known_area & (areas > 0)
+    density = populations[has_density] / areas[has_density]
+    density_percentiles = grouped_quantiles(
+        codes[has_density], density, n_groups, [p / 100 for p in DENSITY_PERCENTILES]
+    )
+
+    parents = None
+    if column == "subregion":
+        # Parent = the region most rows of the subregion belong to
+        region_labels, region_view = store.categorical("region")
+        region_codes = np.frombuffer(region_view, dtype=np.int32)
+        pairs = np.bincount(
+            codes.astype(np.int64) * len(region_labels) + region_codes,
+            minlength=n_groups * len(region_labels),
+        )
+        parents = pairs.reshape(n_groups, len(region_labels)).argmax(axis=1)
+
+    groups = []
+    for i, label in enumerate(labels):
+        group = {
+            "name": label,
+            "count": int(counts[i]),
+            "total_population": int(round(total_population[i])),
+            "mean_population": float(total_population[i] / counts[i]),
+            "median_population": float(median_population[i]),
+            "total_area": float(total_area[i]),
+            "density_percentiles": {
+                f"p{p}": (None if np.isnan(value) else float(value))
+                for p, value in zip(DENSITY_PERCENTILES, density_percentiles[i])
+            },
+        }
+        if parents is not None:
+            group["region"] = region_labels[parents[i]]
+        groups.append(group)
+
+    groups.sort(key=lambda group: (group["name"] is None, group["name"] or ""))
+    return groups
+
+def compute_stats(store: CountryStore) -> Dict:
+    """Statistics by region and by subregion for one dataset version"""
+    return {
+        "version": store.version,
+        "regions": group_stats(store, "region"),
+        "subregions": group_stats(store, "subregion"),
+    }
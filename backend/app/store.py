@@ -0,0 +1,391 @@
+import hashlib
+import logging
+import math
+import sys
+import unicodedata
+from array import array
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+from .models import Country, CountryDetails, SpriteOffset
+
+logger = logging.getLogger(__name__)
+
+# ISO 639-1 codes for the ISO 639-2/3 keys of REST Countries `translations`
+LANGUAGE_CODES = {
+    "ar": "ara", "br": "bre", "cs": "ces", "cy": "cym", "de": "deu", "et": "est",
+    "fa": "per", "fi": "fin", "fr": "fra", "hr": "hrv", "hu": "hun", "it": "ita",
+    "ja": "jpn", "ko": "kor", "nl": "nld", "pl": "pol", "pt": "por", "ru": "rus",
+    "sk": "slk", "es": "spa", "sr": "srp", "sv": "swe", "tr": "tur", "ur": "urd",
+    "zh": "zho",
+}
+
+class CountryRecord:
+    """
+    Lightweight read-only view of one row of a CountryStore.
+    Holds only the store and a row index; field values are read on access.
+    """
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "CountryStore", index: int):
+        self._store = store
+        self._index = index
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def name(self) -> str:
+        return self._store._names[self._index]
+
+    @property
+    def official_name(self) -> Optional[str]:
+        return self._store._official_names[self._index]
+
+    @property
+    def flag(self) -> str:
+        return self._store._flags[self._index]
+
+    @property
+    def population(self) -> int:
+        return self._store._populations[self._index]
+
+    @property
+    def region(self) -> Optional[str]:
+        return self._store._regions[self._index]
+
+    @property
+    def subregion(self) -> Optional[str]:
+        return self._store._subregions[self._index]
+
+    @property
+    def capital(self) -> Optional[str]:
+        return self._store._capitals[self._index]
+
+    @property
+    def area(self) -> Optional[float]:
+        area = self._store._areas[self._index]
+        return None if math.isnan(area) else area
+
+    @property
+    def code(self) -> Optional[str]:
+        return self._store._codes[self._index]
+
+    @property
+    def cca3(self) -> Optional[str]:
+        return self._store._cca3[self._index]
+
+    @property
+    def latlng(self) -> Optional[Tuple[float, float]]:
+        lat = self._store._latitudes[self._index]
+        if math.isnan(lat):
+            return None
+        return lat, self._store._longitudes[self._index]
+
+    @property
+    def borders(self) -> Tuple[str, ...]:
+        return self._store._borders[self._index]
+
+    def translated_name(self, language: str) -> str:
+        """Common name in a translation language, falling back to English"""
+        names = self._store._translations.get(language)
+        return self.name if names is None else names[self._index]
+
+    def to_country(self, sprite: Optional[SpriteOffset] = None) -> Country:
+        """Build the API model for the countries list"""
+        return Country(
+            name=self.name,
+            flag=self.flag,
+            population=self.population,
+            region=self.region,
+            sprite=sprite
+        )
+
+    def to_details(self) -> CountryDetails:
+        """Build the API model for country details"""
+        return CountryDetails(
+            name=self.name,
+            population=self.population,
+            capital=self.capital,
+            flag=self.flag,
+            region=self.region,
+            area=self.area,
+            code=self.code
+        )
+
+    def __repr__(self) -> str:
+        return f"CountryRecord({self.name!r})"
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value else None
+
+def _fold(name: str) -> str:
+    """Lookup key for a name: case-insensitive and accent-insensitive"""
+    decomposed = unicodedata.normalize("NFKD", name.strip())
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+class CountryStore:
+    """
+    Immutable column-oriented country dataset.
+    String columns are tuples of interned strings (regions and the like are
+    shared, not copied per row); numeric columns are compact `array`s, with
+    missing areas stored as NaN. Rows are exposed as `CountryRecord` views.
+    Translated common names are kept as one column per language, with the
+    English name wherever a translation is missing.
+    """
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        flags: Sequence[str],
+        populations: Iterable[int],
+        regions: Sequence[Optional[str]],
+        capitals: Sequence[Optional[str]],
+        areas: Iterable[Optional[float]],
+        codes: Sequence[Optional[str]],
+        official_names: Optional[Sequence[Optional[str]]] = None,
+        subregions: Optional[Sequence[Optional[str]]] = None,
+        cca3: Optional[Sequence[Optional[str]]] = None,
+        latlngs: Optional[Sequence[Optional[Tuple[float, float]]]] = None,
+        borders: Optional[Sequence[Sequence[str]]] = None,
+        translations: Optional[Sequence[Mapping[str, Mapping[str, str]]]] = None,
+    ):
+        self._names = tuple(sys.intern(name) for name in names)
+        self._flags = tuple(flags)
+        self._populations = array("q", populations)
+        self._regions = tuple(_intern(region) for region in regions)
+        self._capitals = tuple(_intern(capital) for capital in capitals)
+        self._areas = array("d", (math.nan if area is None else area for area in areas))
+        self._codes = tuple(_intern(code) for code in codes)
+        self._official_names = tuple(
+            _intern(name) for name in (official_names or [None] * len(self._names))
+        )
+        self._subregions = tuple(
+            _intern(name) for name in (subregions or [None] * len(self._names))
+        )
+        self._cca3 = tuple(_intern(code) for code in (cca3 or [None] * len(self._names)))
+        latlngs = latlngs or [None] * len(self._names)
+        self._latitudes = array("d", (math.nan if p is None else p[0] for p in latlngs))
+        self._longitudes = array("d", (math.nan if p is None else p[1] for p in latlngs))
+        self._borders = tuple(
+            tuple(sys.intern(code) for code in codes)
+            for codes in (borders or [()] * len(self._names))
+        )
+
+        translations = translations or [{}] * len(self._names)
+        languages = sorted({language for row in translations for language in row})
+        self._translations: Dict[str, Tuple[str, ...]] = {
+            language: tuple(
+                _intern((row.get(language) or {}).get("common")) or name
+                for row, name in zip(translations, self._names)
+            )
+            for language in languages
+        }
+
+        size = len(self._names)
+        for column in (self._flags, self._populations, self._regions, self._capitals,
+                       self._areas, self._codes, self._official_names, self._subregions,
+                       self._cca3, self._latitudes, self._longitudes, self._borders,
+                       translations):
+            if len(column) != size:
+                raise ValueError("All columns must have the same length")
+
+        # Exact lookup on common and official names, ignoring case and accents
+        self._name_index: Dict[str, int] = {}
+        for i, name in enumerate(self._official_names):
+            if name:
+                self._name_index[_fold(name)] = i
+        for i, name in enumerate(self._names):
+            self._name_index[_fold(name)] = i
+
+        # The same per translation language; merged in without shadowing English names
+        self._language_index: Dict[str, Dict[str, int]] = {language: {} for language in languages}
+        for i, row in enumerate(translations):
+            for language, names in row.items():
+                for key in ("official", "common"):
+                    if names.get(key):
+                        self._language_index[language][_fold(names[key])] = i
+        for index in self._language_index.values():
+            for key, i in index.items():
+                self._name_index.setdefault(key, i)
+
+        # Case-insensitive lookup on ISO alpha-2 and alpha-3 codes
+        self._code_index: Dict[str, int] = {}
+        for column in (self._cca3, self._codes):
+            for i, code in enumerate(column):
+                if code:
+                    self._code_index[code.lower()] = i
+
+        self._version: Optional[str] = None
+        self._categories: Dict[str, Tuple[Tuple[Optional[str], ...], array]] = {}
+
+    @classmethod
+    def from_restcountries(cls, countries_data: Iterable[dict]) -> "CountryStore":
+        """
+        Build a store from REST Countries API records.
+        Records without a usable name or flag are skipped.
+        """
+        names, flags, populations, regions = [], [], [], []
+        capitals, areas, codes, official_names = [], [], [], []
+        subregions, cca3, latlngs, borders = [], [], [], []
+        translations = []
+
+        for country_data in countries_data:
+            try:
+                name_data = country_data.get("name", {})
+                name = name_data.get("common", "Unknown")
+                flag = country_data.get("flags", {}).get("png", "")
+                if name == "Unknown" or not flag:  # Only include countries with valid data
+                    continue
+
+                capital = country_data.get("capital") or [None]
+                area = country_data.get("area")
+                latlng = country_data.get("latlng")
+                row = (
+                    name,
+                    name_data.get("official"),
+                    flag,
+                    int(country_data.get("population") or 0),
+                    country_data.get("region"),
+                    capital[0],
+                    None if area is None else float(area),
+                    country_data.get("cca2"),
+                    country_data.get("subregion"),
+                    country_data.get("cca3"),
+                    (float(latlng[0]), float(latlng[1])) if latlng and len(latlng) == 2 else None,
+                    tuple(country_data.get("borders") or ()),
+                    {
+                        language: names
+                        for language, names in (country_data.get("translations") or {}).items()
+                        if isinstance(names, dict)
+                    },
+                )
+            except Exception as e:
+                logger.warning("Error processing country data: %s", e, extra={"sample": True})
+                continue
+
+            names.append(row[0])
+            official_names.append(row[1])
+            flags.append(row[2])
+            populations.append(row[3])
+            regions.append(row[4])
+            capitals.append(row[5])
+            areas.append(row[6])
+            codes.append(row[7])
+            subregions.append(row[8])
+            cca3.append(row[9])
+            latlngs.append(row[10])
+            borders.append(row[11])
+            translations.append(row[12])
+
+        return cls(
+            names, flags, populations, regions, capitals, areas, codes,
+            official_names, subregions, cca3, latlngs, borders, translations
+        )
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __getitem__(self, index: int) -> CountryRecord:
+        if not -len(self) <= index < len(self):
+            raise IndexError("CountryStore index out of range")
+        return CountryRecord(self, index % len(self))
+
+    def __iter__(self) -> Iterator[CountryRecord]:
+        for i in range(len(self._names)):
+            yield CountryRecord(self, i)
+
+    def find(self, name: str, language: Optional[str] = None) -> Optional[CountryRecord]:
+        """
+        Find a country by common or official name, ignoring case and accents.
+        Names in any translation language match unless `language` restricts
+        the lookup to that one.
+        """
+        index_by_name = self._name_index if language is None else self._language_index.get(language, {})
+        index = index_by_name.get(_fold(name))
+        return None if index is None else CountryRecord(self, index)
+
+    def find_code(self, code: str) -> Optional[CountryRecord]:
+        """Find a country by its ISO 3166-1 alpha-2 or alpha-3 code, case-insensitively"""
+        index = self._code_index.get(code.strip().lower())
+        return None if index is None else CountryRecord(self, index)
+
+    def countries(self, sprites: Optional[Mapping[int, SpriteOffset]] = None) -> List[Country]:
+        """Materialise the whole store as API models, with flag atlas offsets by row if given"""
+        sprites = sprites or {}
+        return [record.to_country(sprites.get(record.index)) for record in self]
+
+    def localised_names(self, language: str) -> Tuple[str, ...]:
+        """Common names in a translation language, row for row, falling back to English"""
+        return self._translations.get(language, self._names)
+
+    @property
+    def languages(self) -> Tuple[str, ...]:
+        """Translation languages present in the dataset (REST Countries keys, e.g. `deu`)"""
+        return tuple(self._translations)
+
+    def resolve_language(self, code: str) -> Optional[str]:
+        """
+        Translation key for an ISO 639-1 code (`de`) or a key itself (`deu`),
+        or None when the dataset has no translations in that language
+        """
+        code = code.strip().lower()
+        language = LANGUAGE_CODES.get(code, code)
+        return language if language in self._translations else None
+
+    @property
+    def populations(self) -> memoryview:
+        """Read-only view of the population column (int64)"""
+        return memoryview(self._populations).toreadonly()
+
+    @property
+    def areas(self) -> memoryview:
+        """Read-only view of the area column (float64, NaN when unknown)"""
+        return memoryview(self._areas).toreadonly()
+
+    @property
+    def latitudes(self) -> memoryview:
+        """Read-only view of the latitude column in degrees (float64, NaN when unknown)"""
+        return memoryview(self._latitudes).toreadonly()
+
+    @property
+    def longitudes(self) -> memoryview:
+        """Read-only view of the longitude column in degrees (float64, NaN when unknown)"""
+        return memoryview(self._longitudes).toreadonly()
+
+    @property
+    def cca3_codes(self) -> Tuple[Optional[str], ...]:
+        return self._cca3
+
+    @property
+    def borders(self) -> Tuple[Tuple[str, ...], ...]:
+        return self._borders
+
+    def categorical(self, column: str) -> Tuple[Tuple[Optional[str], ...], memoryview]:
+        """
+        Dictionary-encode a string column (`region` or `subregion`).
+        Returns the distinct labels and a read-only int32 column of label indexes.
+        Computed once per store on first use.
+        """
+        if column not in self._categories:
+            values = {"region": self._regions, "subregion": self._subregions}[column]
+            labels = tuple(set(values))
+            positions = {label: i for i, label in enumerate(labels)}
+            codes = array("i", map(positions.__getitem__, values))
+            self._categories[column] = (labels, codes)
+        labels, codes = self._categories[column]
+        return labels, memoryview(codes).toreadonly()
+
+    @property
+    def version(self) -> str:
+        """Content hash identifying this dataset"""
+        if self._version is None:
+            digest = hashlib.blake2b(digest_size=8)
+            for column in (self._names, self._flags, self._regions, self._capitals,
+                           self._codes, self._official_names, self._subregions,
+                           self._cca3, self._borders):
+                digest.update(repr(column).encode())
+            digest.update(repr(sorted(self._translations.items())).encode())
+            for numbers in (self._populations, self._areas, self._latitudes, self._longitudes):
+                digest.update(numbers.tobytes())
+            self._version = digest.hexdigest()
+        return self._version
@@ -0,0 +1,273 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+logger = logging.getLogger(__name__)
+
+BUNDLED_DATASET = os.path.join(os.path.dirname(__file__), "data", "countries.json")
+
+# REST Countries accepts at most 10 fields per `/all` request
+FIELD_GROUPS = [
+    "name,flags,population,region,subregion,capital,area,cca2,cca3",
+    "cca3,latlng,borders,translations",
+]
+
+class SourceUnsupported(Exception):
+    """Raised by a source that cannot answer a given path at all"""
+
+class UpstreamSource(ABC):
+    """
+    One place the country dataset can be fetched from, with its health.
+    Latency is an exponentially weighted moving average of successful calls.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latency: Optional[float] = None
+        self.failures = 0
+        self.demoted_until = 0.0
+        self.last_error: Optional[str] = None
+
+    @abstractmethod
+    async def get_json(self, path: str):
+        """Decoded JSON body for `path`; raises SourceUnsupported if it cannot be answered"""
+
+    async def get_countries(self) -> List[dict]:
+        """
+        Every country, with each of FIELD_GROUPS requested from `/all` and the
+        records merged on their CCA3 code. A record without one cannot be
+        joined, so its copy from the first group is kept as is.
+        """
+        merged: Dict[str, dict] = {}
+        unmatched: List[dict] = []
+        for group, fields in enumerate(FIELD_GROUPS):
+            for country in await self.get_json(f"/all?fields={fields}"):
+                code = country.get("cca3") if isinstance(country, dict) else None
+                if code:
+                    merged.setdefault(code, {}).update(country)
+                elif group == 0:
+                    unmatched.append(country)
+        return list(merged.values()) + unmatched
+
+    def is_demoted(self, now: float) -> bool:
+        return self.demoted_until > now
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.name!r})"
+
+class HttpSource(UpstreamSource):
+    """A REST Countries compatible API (the primary or a mirror)"""
+
+    def __init__(self, name: str, base_url: str, timeout: float = 10.0, probe_path: str = "/alpha/fr"):
+        super().__init__(name)
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.probe_path = probe_path
+
+    async def get_json(self, path: str):
+        # Deferred import: httpx is only needed once something goes upstream
+        import httpx
+
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            response = await client.get(f"{self.base_url}{path}")
+            response.raise_for_status()
+        return response.json()
+
+class BundledSource(UpstreamSource):
+    """
+    Versioned dataset shipped with the package, used when every live source
+    is down. Answers the listing (`/all`) and exact name lookups only.
+    """
+
+    def __init__(self, name: str = "bundled", path: str = BUNDLED_DATASET):
+        super().__init__(name)
+        self.path = path
+        self.version: Optional[str] = None
+        self._countries: Optional[List[dict]] = None
+
+    def _load(self) -> List[dict]:
+        if self._countries is None:
+            with open(self.path, encoding="utf-8") as file:
+                payload = json.load(file)
+            self.version = payload.get("version")
+            self._countries = payload["countries"]
+        return self._countries
+
+    async def get_countries(self) -> List[dict]:
+        # Stored with every field already merged
+        return await asyncio.to_thread(self._load)
+
+    async def get_json(self, path: str):
+        countries = await asyncio.to_thread(self._load)
+        parts = urlsplit(path)
+        if parts.path == "/all":
+            return countries
+        if parts.path.startswith("/name/"):
+            name = unquote(parts.path[len("/name/"):]).strip().lower()
+            full_text = parse_qs(parts.query).get("fullText") == ["true"]
+            matches = []
+            for country in countries:
+                names = [n.lower() for n in country.get("name", {}).values() if isinstance(n, str)]
+                if name in names or (not full_text and any(name in n for n in names)):
+                    matches.append(country)
+            return matches
+        raise SourceUnsupported(path)
+
+# Paths that look a country up, where "not found" is a legitimate answer
+LOOKUP_PREFIXES = ("/name/", "/alpha/")
+
+def is_authoritative(error: Exception, path: str) -> bool:
+    """
+    Whether an error fetching `path` is a real answer rather than a source failure.
+    Only a 404 from a country lookup is: the source is up and the country does
+    not exist, so there is no point failing over. Any other 4xx, and any error
+    on `/all`, means the source is broken or has changed its API.
+    """
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    return status == 404 and urlsplit(path).path.startswith(LOOKUP_PREFIXES)
+
+class UpstreamPool:
+    """
+    Ordered upstream sources with latency-aware selection and failover.
+
+    Live sources that are not demoted are tried fastest first (by latency
+    EWMA, ties broken by configured order; a source without measurements
+    counts as fastest so it gets measured). Bundled sources come last.
+    A failing source is demoted for `cooldown` seconds, doubling with each
+    further consecutive failure, and is retried when that expires or when a
+    health probe succeeds. If every live source is demoted they are still
+    tried, soonest-to-recover first, before falling back to bundled data.
+    """
+
+    def __init__(
+        self,
+        sources: Sequence[UpstreamSource],
+        cooldown: float = 30.0,
+        max_cooldown: float = 600.0,
+        smoothing: float = 0.3,
+    ):
+        if not sources:
+            raise ValueError("At least one upstream source is required")
+        self.sources = list(sources)
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.smoothing = smoothing
+
+    @classmethod
+    def from_env(cls, timeout: float) -> "UpstreamPool":
+        """
+        Build the pool from UPSTREAM_URLS (comma-separated, primary first)
+        plus the bundled dataset unless UPSTREAM_BUNDLED is false.
+        """
+        urls = os.getenv("UPSTREAM_URLS", "https://restcountries.com/v3.1")
+        probe_path = os.getenv("UPSTREAM_PROBE_PATH", "/alpha/fr")
+        sources: List[UpstreamSource] = [
+            HttpSource("primary" if i == 0 else f"mirror-{i}", url.strip(), timeout, probe_path)
+            for i, url in enumerate(u for u in urls.split(",") if u.strip())
+        ]
+        if os.getenv("UPSTREAM_BUNDLED", "true").lower() == "true":
+            sources.append(BundledSource())
+        return cls(
+            sources,
+            cooldown=float(os.getenv("UPSTREAM_DEMOTE_SECONDS", "30")),
+        )
+
+    def ranked(self, now: Optional[float] = None) -> List[UpstreamSource]:
+        """Sources in the order the next request will try them"""
+        now = time.monotonic() if now is None else now
+        live = [s for s in self.sources if not isinstance(s, BundledSource)]
+        bundled = [s for s in self.sources if isinstance(s, BundledSource)]
+        order = {id(source): i for i, source in enumerate(self.sources)}
+
+        healthy = sorted(
+            (s for s in live if not s.is_demoted(now)),
+            key=lambda s: (s.latency or 0.0, order[id(s)]),
+        )
+        demoted = sorted((s for s in live if s.is_demoted(now)), key=lambda s: s.demoted_until)
+        return healthy + (bundled + demoted if healthy else demoted + bundled)
+
+    async def get_json(self, path: str) -> Tuple[object, UpstreamSource]:
+        """
+        Fetch `path` from the best available source.
+        Returns the decoded body and the source that answered. Authoritative
+        errors (a 404 from a lookup) are raised at once; if every source fails
+        the last error is raised.
+        """
+        return await self._first_answer(path, lambda source: source.get_json(path))
+
+    async def get_countries(self) -> Tuple[List[dict], UpstreamSource]:
+        """
+        Fetch every country from the best available source, as in `get_json`.
+        All field groups come from the same source so the records match.
+        """
+        return await self._first_answer("/all", lambda source: source.get_countries())
+
+    async def _first_answer(
+        self, path: str, fetch: Callable[[UpstreamSource], Awaitable[object]]
+    ) -> Tuple[object, UpstreamSource]:
+        last_error: Optional[Exception] = None
+        for source in self.ranked():
+            start = time.monotonic()
+            try:
+                data = await fetch(source)
+            except SourceUnsupported:
+                continue
+            except Exception as e:
+                if is_authoritative(e, path):
+                    self.record_success(source, time.monotonic() - start)
+                    raise
+                self.record_failure(source, e)
+                last_error = e
+                continue
+            self.record_success(source, time.monotonic() - start)
+            if last_error is not None or isinstance(source, BundledSource):
+                logger.warning("Served %s from upstream source %s", path, source.name)
+            return data, source
+        if last_error is None:
+            raise SourceUnsupported(path)
+        raise last_error
+
+    def record_success(self, source: UpstreamSource, elapsed: float) -> None:
+        if source.latency is None:
+            source.latency = elapsed
+        else:
+            source.latency += self.smoothing * (elapsed - source.latency)
+        if source.failures:
+            logger.info("Upstream source %s recovered", source.name)
+        source.failures = 0
+        source.demoted_until = 0.0
+        source.last_error = None
+
+    def record_failure(self, source: UpstreamSource, error: Exception) -> None:
+        source.failures += 1
+        source.last_error = repr(error)
+        delay = min(self.cooldown * 2 ** (source.failures - 1), self.max_cooldown)
+        source.demoted_until = time.monotonic() + delay
+        logger.warning(
+            "Upstream source %s failed (%s), demoted for %.0fs", source.name, error, delay
+        )
+
+    async def probe(self) -> None:
+        """Check every live source once, updating latency and demotion"""
+        async def check(source: HttpSource) -> None:
+            start = time.monotonic()
+            try:
+                await source.get_json(source.probe_path)
+            except Exception as e:
+                self.record_failure(source, e)
+            else:
+                self.record_success(source, time.monotonic() - start)
+
+        await asyncio.gather(*[check(s) for s in self.sources if isinstance(s, HttpSource)])
+
+    async def run_probes(self, interval: float) -> None:
+        """Probe all live sources every `interval` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            await self.probe()
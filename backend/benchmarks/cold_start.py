@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark: interpreter start to first 200 response.
+
+Starts a fresh `uvicorn app.main:app` process, polls `/health` until it answers
+200 and reports the elapsed wall time. Exits non-zero when the time exceeds the
+budget (COLD_START_BUDGET_MS, default 3000ms).
+
+Run from the backend directory:
+    python -m benchmarks.cold_start [--runs 5]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", "3000"))
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def measure_cold_start(path: str = "/health", timeout: float = 30.0) -> float:
+    """Return milliseconds from process spawn to the first 200 response on `path`"""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}{path}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--no-access-log", "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with code {process.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1.0) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.005)
+        raise TimeoutError(f"no 200 from {url} within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args()
+
+    samples = [measure_cold_start() for _ in range(args.runs)]
+    print(f"cold start to first 200 over {args.runs} runs (budget {args.budget_ms:.0f}ms)")
+    print(f"  min {min(samples):.0f}ms  median {statistics.median(samples):.0f}ms  max {max(samples):.0f}ms")
+
+    if statistics.median(samples) > args.budget_ms:
+        print("FAIL: cold start exceeds budget")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark: `/countries` payload size and client decode time per format.
+
+Encodes a synthetic, restcountries-shaped dataset in every format `/countries`
+can negotiate and reports raw size, gzip size, and the time a client needs to
+decode it back into rows.
+
+Run from the backend directory:
+    python -m benchmarks.encoding_bench [--rows 250]
+"""
+
+import argparse
+import gzip
+import json
+import random
+import timeit
+
+import msgpack
+
+from app.encoding import (
+    COLUMNAR_JSON,
+    COLUMNAR_MSGPACK,
+    ENCODERS,
+    JSON,
+    MSGPACK,
+)
+from app.models import Country
+
+REGIONS = ["Africa", "Americas", "Asia", "Europe", "Oceania", "Antarctic"]
+
+def synthetic_countries(rows: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    countries = []
+    for i in range(rows):
+        code = f"{chr(97 + i // 26 % 26)}{chr(97 + i % 26)}"
+        countries.append(Country(
+            name=f"Country {i}",
+            flag=f"https://flagcdn.com/w320/{code}.png",
+            population=rng.randint(1_000, 1_400_000_000),
+            region=rng.choice(REGIONS),
+        ))
+    return countries
+
+def _columns_to_rows(payload):
+    columns = payload["columns"]
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+DECODERS = {
+    JSON: json.loads,
+    COLUMNAR_JSON: lambda body: _columns_to_rows(json.loads(body)),
+    MSGPACK: msgpack.unpackb,
+    COLUMNAR_MSGPACK: lambda body: _columns_to_rows(msgpack.unpackb(body)),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=250)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    countries = synthetic_countries(args.rows)
+    print(f"{args.rows} countries")
+    print(f"{'format':<46}{'bytes':>10}{'gzip':>10}{'decode us':>12}{'rows us':>10}")
+    for media_type, encode in ENCODERS.items():
+        body = encode(countries)
+        decode = DECODERS[media_type]
+        raw_decode = json.loads if "json" in media_type else msgpack.unpackb
+        decode_us = timeit.timeit(lambda: raw_decode(body), number=args.repeat) / args.repeat * 1e6
+        rows_us = timeit.timeit(lambda: decode(body), number=args.repeat) / args.repeat * 1e6
+        print(
+            f"{media_type:<46}{len(body):>10}{len(gzip.compress(body)):>10}"
+            f"{decode_us:>12.1f}{rows_us:>10.1f}"
+        )
+    print("decode = parse only; rows = parse and rebuild per-country rows")
+
+if __name__ == "__main__":
+    main()
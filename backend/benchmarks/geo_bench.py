@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark: nearest-neighbour and radius query latency.
+
+Builds a GeoIndex over synthetic points and times k-nearest and
+"within 1000 km" queries against a per-request pure Python haversine scan,
+which is what answering these queries without an index would cost.
+
+Run from the backend directory:
+    python -m benchmarks.geo_bench [--rows 250 100000]
+"""
+
+import argparse
+import math
+import random
+import time
+
+from app.geo import EARTH_RADIUS_KM, GeoIndex
+from app.store import CountryStore
+
+def synthetic_store(rows: int, seed: int = 7) -> CountryStore:
+    rng = random.Random(seed)
+    return CountryStore(
+        names=[f"Place {i}" for i in range(rows)],
+        flags=[""] * rows,
+        populations=[0] * rows,
+        regions=[None] * rows,
+        capitals=[None] * rows,
+        areas=[None] * rows,
+        codes=[None] * rows,
+        cca3=[f"P{i}" for i in range(rows)],
+        latlngs=[(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(rows)],
+    )
+
+def python_scan(store: CountryStore, row: int, radius_km: float) -> list:
+    lat1 = math.radians(store.latitudes[row])
+    lng1 = math.radians(store.longitudes[row])
+    matches = []
+    for other, (lat, lng) in enumerate(zip(store.latitudes, store.longitudes)):
+        lat2, lng2 = math.radians(lat), math.radians(lng)
+        h = (math.sin((lat2 - lat1) / 2) ** 2
+             + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+        distance = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+        if other != row and distance <= radius_km:
+            matches.append((distance, other))
+    return sorted(matches)
+
+def per_query_us(query, rows: int, repeat: int) -> float:
+    rng = random.Random(1)
+    origins = [rng.randrange(rows) for _ in range(repeat)]
+    start = time.perf_counter()
+    for origin in origins:
+        query(origin)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[250, 100_000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}{'build ms':>10}{'knn(5) us':>12}{'1000km us':>12}{'py scan us':>12}")
+    for rows in args.rows:
+        store = synthetic_store(rows)
+        start = time.perf_counter()
+        index = GeoIndex(store)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        knn_us = per_query_us(lambda row: index.nearest(row, 5), rows, args.repeat)
+        radius_us = per_query_us(lambda row: index.within(row, 1000), rows, args.repeat)
+        scan_us = per_query_us(lambda row: python_scan(store, row, 1000), rows, max(1, args.repeat // 20))
+        print(f"{rows:>10}{build_ms:>10.1f}{knn_us:>12.1f}{radius_us:>12.1f}{scan_us:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: does logging block the event loop under load?
+
+Simulates concurrent request handlers logging to a slow sink (a stderr pipe
+nobody is draining fast enough) and measures event loop lag with a ticker task.
+Compares a synchronous handler on the root logger with the queue-based setup
+from `app.logging_config`.
+
+Run from the backend directory:
+    python -m benchmarks.logging_bench
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+
+from app.logging_config import JsonFormatter, configure_logging
+
+class SlowSink(logging.Handler):
+    """Handler whose writes take `delay` seconds each"""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+        self.written = 0
+
+    def emit(self, record):
+        self.format(record)
+        time.sleep(self.delay)
+        self.written += 1
+
+async def measure_lag(requests: int, lines: int) -> list:
+    """Run logging request handlers alongside a 1ms ticker, return lag samples in ms"""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        interval = 0.001
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append((time.perf_counter() - start - interval) * 1000)
+
+    async def handler(i):
+        log = logging.getLogger("bench.request")
+        for j in range(lines):
+            log.info("request %d line %d", i, j, extra={"cache": "hit", "duration_ms": 0.1})
+            await asyncio.sleep(0)
+
+    tick = asyncio.ensure_future(ticker())
+    await asyncio.gather(*(handler(i) for i in range(requests)))
+    done.set()
+    await tick
+    return lags
+
+def run(mode: str, requests: int, lines: int, delay: float) -> dict:
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    root.handlers[:] = []
+    sink = SlowSink(delay)
+    listener = None
+    if mode == "sync":
+        sink.setFormatter(JsonFormatter())
+        root.addHandler(sink)
+        root.setLevel(logging.INFO)
+    else:
+        listener = configure_logging(level="INFO", sample_every=1, handler=sink)
+
+    start = time.perf_counter()
+    lags = asyncio.run(measure_lag(requests, lines))
+    elapsed = time.perf_counter() - start
+    if listener is not None:
+        listener.stop()
+    root.handlers[:] = saved_handlers
+    root.setLevel(saved_level)
+
+    lags.sort()
+    return {
+        "mode": mode,
+        "loop_s": elapsed,
+        "p50_ms": statistics.median(lags) if lags else 0.0,
+        "p99_ms": lags[int(len(lags) * 0.99)] if lags else 0.0,
+        "max_ms": lags[-1] if lags else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--lines", type=int, default=10)
+    parser.add_argument("--sink-delay-us", type=float, default=200)
+    args = parser.parse_args()
+
+    results = [
+        run(mode, args.requests, args.lines, args.sink_delay_us / 1e6)
+        for mode in ("sync", "queue")
+    ]
+
+    print(f"{args.requests * args.lines} log lines, sink write {args.sink_delay_us:.0f}us")
+    print(f"{'mode':<8}{'loop time s':>12}{'lag p50 ms':>12}{'lag p99 ms':>12}{'lag max ms':>12}")
+    for r in results:
+        print(f"{r['mode']:<8}{r['loop_s']:>12.3f}{r['p50_ms']:>12.3f}{r['p99_ms']:>12.3f}{r['max_ms']:>12.3f}")
+
+    sync, queued = results
+    if queued["loop_s"] >= sync["loop_s"]:
+        print("FAIL: queue-based logging did not reduce time spent on the event loop")
+        sys.exit(1)
+    print(f"OK: event loop freed {sync['loop_s'] / queued['loop_s']:.1f}x sooner with queue-based logging")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark: `/stats` aggregation time on large synthetic datasets.
+
+Times the vectorised region and subregion statistics over stores of
+increasing size. The per-dataset work done once on first use (categorical
+encoding of region columns, content-hash version) is reported separately
+from the aggregation itself.
+
+Run from the backend directory:
+    python -m benchmarks.stats_bench [--rows 250 100000 1000000]
+"""
+
+import argparse
+import random
+import time
+
+from app.stats import compute_stats
+from app.store import CountryStore
+
+REGIONS = {
+    "Africa": ["Northern Africa", "Western Africa", "Eastern Africa", "Southern Africa"],
+    "Americas": ["North America", "South America", "Caribbean", "Central America"],
+    "Asia": ["Eastern Asia", "Southern Asia", "Western Asia", "Central Asia"],
+    "Europe": ["Western Europe", "Northern Europe", "Southern Europe", "Eastern Europe"],
+    "Oceania": ["Australia and New Zealand", "Polynesia", "Melanesia"],
+}
+
+def synthetic_store(rows: int, seed: int = 7) -> CountryStore:
+    rng = random.Random(seed)
+    regions = [rng.choice(list(REGIONS)) for _ in range(rows)]
+    return CountryStore(
+        names=[f"Place {i}" for i in range(rows)],
+        flags=[""] * rows,
+        populations=[rng.randint(0, 50_000_000) for _ in range(rows)],
+        regions=regions,
+        capitals=[None] * rows,
+        areas=[rng.uniform(1, 1e6) if i % 20 else None for i in range(rows)],
+        codes=[None] * rows,
+        subregions=[rng.choice(REGIONS[region]) for region in regions],
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[250, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}{'encode ms':>12}{'version ms':>12}{'stats ms':>12}")
+    for rows in args.rows:
+        store = synthetic_store(rows)
+        start = time.perf_counter()
+        store.categorical("region")
+        store.categorical("subregion")
+        encode_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        store.version
+        version_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        compute_stats(store)
+        stats_ms = (time.perf_counter() - start) * 1000
+        print(f"{rows:>10}{encode_ms:>12.1f}{version_ms:>12.1f}{stats_ms:>12.1f}")
+
+if __name__ == "__main__":
+    main()
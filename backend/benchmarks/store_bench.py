@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory per record and build time of the columnar CountryStore.
+
+Builds synthetic datasets (default 250, 100k and 1M rows) and compares the
+store against a plain list of pydantic `Country` objects. Memory is measured
+with tracemalloc and covers the containers each layout allocates.
+
+Run from the backend directory:
+    python -m benchmarks.store_bench [--rows 250 100000 1000000]
+"""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from app.models import Country
+from app.store import CountryStore
+
+REGIONS = ["Africa", "Americas", "Asia", "Europe", "Oceania", "Antarctic"]
+
+def synthetic_columns(rows: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    return {
+        "names": [f"Place {i}" for i in range(rows)],
+        "flags": [f"https://flagcdn.com/w320/{i:x}.png" for i in range(rows)],
+        "populations": [rng.randint(1_000, 10_000_000) for _ in range(rows)],
+        "regions": [rng.choice(REGIONS) for _ in range(rows)],
+        "capitals": [f"Capital {i % 5000}" for i in range(rows)],
+        "areas": [rng.uniform(1, 1e6) if i % 10 else None for i in range(rows)],
+        "codes": [f"{i % 676:03d}" for i in range(rows)],
+    }
+
+def measure(build):
+    """Return (seconds, bytes) for `build()`; time and memory are taken in separate runs"""
+    gc.collect()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, size
+
+def build_models(columns: dict) -> list:
+    return [
+        Country(name=n, flag=f, population=p, region=r)
+        for n, f, p, r in zip(columns["names"], columns["flags"],
+                              columns["populations"], columns["regions"])
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[250, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'layout':<10}{'build s':>10}{'bytes/rec':>12}{'total MB':>10}")
+    for rows in args.rows:
+        columns = synthetic_columns(rows)
+        results = [
+            ("store", *measure(lambda: CountryStore(**columns))),
+            ("pydantic", *measure(lambda: build_models(columns))),
+        ]
+        for layout, seconds, size in results:
+            print(f"{rows:>10} {layout:<10}{seconds:>10.3f}{size / rows:>12.0f}{size / 2**20:>10.1f}")
+    print("bytes/rec excludes the source strings, which both layouts share;")
+    print("store rows carry 7 fields and a name index, pydantic Country rows carry 4")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Refresh the bundled offline dataset (app/data/countries.json) from the primary
+upstream. The bundled copy is served only when every live source is down.
+
+Usage:
+    python refresh_dataset.py [--url https://restcountries.com/v3.1]
+"""
+
+import argparse
+import datetime
+import json
+import httpx
+from app.upstream import BUNDLED_DATASET, FIELD_GROUPS
+
+def fetch(url: str) -> list:
+    """Fetch every country, merging the field groups on the CCA3 code"""
+    merged = {}
+    with httpx.Client(timeout=60.0) as client:
+        for fields in FIELD_GROUPS:
+            response = client.get(f"{url}/all", params={"fields": fields})
+            response.raise_for_status()
+            for country in response.json():
+                merged.setdefault(country["cca3"], {}).update(country)
+    return sorted(merged.values(), key=lambda country: country["name"]["common"])
+
+def write(countries: list, source: str) -> None:
+    """Write one country per line so refreshes produce readable diffs"""
+    version = datetime.date.today().strftime("%Y.%m.%d")
+    with open(BUNDLED_DATASET, "w", encoding="utf-8") as file:
+        file.write("{\n")
+        file.write(f'"version": {json.dumps(version)},\n"source": {json.dumps(source)},\n"countries": [\n')
+        file.write(",\n".join(
+            json.dumps(country, ensure_ascii=False, separators=(",", ":")) for country in countries
+        ))
+        file.write("\n]\n}\n")
+    print(f"Wrote {len(countries)} countries, version {version}, to {BUNDLED_DATASET}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="https://restcountries.com/v3.1")
+    args = parser.parse_args()
+    write(fetch(args.url), args.url)
+
+if __name__ == "__main__":
+    main()
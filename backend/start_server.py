@@ -31,7 +31,8 @@ def start_server():
             host="127.0.0.1", 
             port=8001, 
             reload=True,
-            log_level="info"
+            log_level="info",
+            access_log=False  # app.access emits structured access logs
         )
         
     except KeyboardInterrupt:
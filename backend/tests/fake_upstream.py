@@ -0,0 +1,52 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+class FakeUpstream:
+    """
+    Local HTTP server standing in for an external service in tests.
+    `routes` maps a path (query string included) to (status, content type, body).
+    Every request path is recorded in `requests`; each response waits `delay`
+    seconds first. Both can be changed while the server runs.
+    """
+
+    def __init__(self, routes: Dict[str, Tuple[int, str, bytes]], delay: float = 0.0):
+        self.routes = routes
+        self.delay = delay
+        self.requests: List[str] = []
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                upstream.requests.append(self.path)
+                time.sleep(upstream.delay)
+                status, content_type, body = upstream.routes.get(
+                    self.path, (404, "text/plain", b"not found")
+                )
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FakeUpstream":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
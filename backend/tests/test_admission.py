@@ -0,0 +1,165 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.admission import (
+    AdmissionControlMiddleware,
+    AdmissionGate,
+    ClientRateLimiter,
+    classify_route,
+)
+
+def build_app(gates, rate_limiter=None):
+    """Build a minimal app wrapped in the admission middleware"""
+    test_app = FastAPI()
+
+    @test_app.get("/countries")
+    async def countries():
+        return []
+
+    @test_app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    test_app.add_middleware(AdmissionControlMiddleware, gates=gates, rate_limiter=rate_limiter)
+    return test_app
+
+class TestClientRateLimiter:
+    """Test suite for the per-client token bucket"""
+
+    def test_allows_burst_then_limits(self):
+        """Test that a client can spend its burst and is then limited"""
+        limiter = ClientRateLimiter(rate=1.0, burst=3)
+
+        results = [limiter.allow("a", now=0.0)[0] for _ in range(4)]
+
+        assert results == [True, True, True, False]
+
+    def test_refills_over_time(self):
+        """Test that tokens refill at the configured rate"""
+        limiter = ClientRateLimiter(rate=2.0, burst=1)
+        assert limiter.allow("a", now=0.0) == (True, 0.0)
+
+        allowed, retry_after = limiter.allow("a", now=0.1)
+        assert not allowed
+        assert retry_after == pytest.approx(0.4)
+
+        assert limiter.allow("a", now=0.6)[0]
+
+    def test_clients_are_independent(self):
+        """Test that one client exhausting its bucket does not affect another"""
+        limiter = ClientRateLimiter(rate=1.0, burst=1)
+        limiter.allow("a", now=0.0)
+
+        assert not limiter.allow("a", now=0.0)[0]
+        assert limiter.allow("b", now=0.0)[0]
+
+    def test_memory_bounded_by_max_clients(self):
+        """Test that the least recently seen clients are evicted"""
+        limiter = ClientRateLimiter(rate=1.0, burst=1, max_clients=2)
+        for client in ("a", "b", "c"):
+            limiter.allow(client, now=0.0)
+
+        assert len(limiter) == 2
+        # "a" was evicted and comes back with a full bucket
+        assert limiter.allow("a", now=0.0)[0]
+
+class TestAdmissionGate:
+    """Test suite for the per-route-class concurrency gate"""
+
+    @pytest.mark.asyncio
+    async def test_sheds_when_queue_full(self):
+        """Test that requests beyond concurrency plus queue depth are shed"""
+        gate = AdmissionGate("detail", max_concurrent=1, max_queue=1, max_wait=1.0)
+        assert await gate.acquire()
+
+        queued = asyncio.ensure_future(gate.acquire())
+        await asyncio.sleep(0)
+        assert gate.queued == 1
+
+        assert not await gate.acquire()
+
+        gate.release()
+        assert await queued
+        assert gate.active == 1
+
+    @pytest.mark.asyncio
+    async def test_sheds_after_max_wait(self):
+        """Test that queued requests give up once they waited too long"""
+        gate = AdmissionGate("detail", max_concurrent=1, max_queue=10, max_wait=0.01)
+        assert await gate.acquire()
+
+        assert not await gate.acquire()
+        assert gate.queued == 0
+
+    @pytest.mark.asyncio
+    async def test_slot_handed_over_at_timeout_is_kept(self):
+        """Test that a slot released into a waiter that just timed out is not leaked"""
+        gate = AdmissionGate("detail", max_concurrent=1, max_queue=10, max_wait=1.0)
+        assert await gate.acquire()
+
+        async def hand_over_then_time_out(waiter, timeout):
+            gate.release()
+            raise asyncio.TimeoutError
+
+        with patch("app.admission.asyncio.wait_for", hand_over_then_time_out):
+            assert await gate.acquire()
+
+        gate.release()
+        assert gate.active == 0
+        assert gate.queued == 0
+
+    @pytest.mark.asyncio
+    async def test_release_frees_slot(self):
+        """Test that releasing without waiters frees the slot"""
+        gate = AdmissionGate("list", max_concurrent=1, max_queue=0, max_wait=0)
+        assert await gate.acquire()
+        gate.release()
+
+        assert gate.active == 0
+        assert await gate.acquire()
+
+class TestAdmissionControlMiddleware:
+    """Test suite for the admission control middleware"""
+
+    def test_classify_route(self):
+        """Test that routes map to the expected admission classes"""
+        assert classify_route("/countries") == "list"
+        assert classify_route("/countries/") == "list"
+        assert classify_route("/countries/france") == "detail"
+        assert classify_route("/countries/france/nearby") == "list"
+        assert classify_route("/stats") == "list"
+        assert classify_route("/countries/changes") == "stream"
+        assert classify_route("/health") is None
+
+    def test_sheds_with_503_and_retry_after(self):
+        """Test that an overloaded route class is shed with 503"""
+        gate = AdmissionGate("list", max_concurrent=0, max_queue=0, max_wait=0)
+        client = TestClient(build_app({"list": gate}))
+
+        response = client.get("/countries")
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+        assert "overloaded" in response.json()["detail"]
+
+    def test_rate_limited_with_429(self):
+        """Test that a client over its rate limit gets 429"""
+        gate = AdmissionGate("list", max_concurrent=10, max_queue=0, max_wait=0)
+        limiter = ClientRateLimiter(rate=0.5, burst=1)
+        client = TestClient(build_app({"list": gate}, limiter))
+
+        assert client.get("/countries").status_code == 200
+        response = client.get("/countries")
+
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) >= 1
+
+    def test_unclassified_routes_bypass_limits(self):
+        """Test that health checks are never shed"""
+        gate = AdmissionGate("list", max_concurrent=0, max_queue=0, max_wait=0)
+        limiter = ClientRateLimiter(rate=0.001, burst=0)
+        client = TestClient(build_app({"list": gate}, limiter))
+
+        assert client.get("/health").status_code == 200
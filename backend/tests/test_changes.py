@@ -0,0 +1,220 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import httpx
+import pytest
+from app.changes import ChangeFeed, diff_stores
+from app.services import CountryService
+from app.store import CountryStore
+from app.upstream import FIELD_GROUPS, HttpSource, UpstreamPool
+from benchmarks.cold_start import BACKEND_DIR
+from tests.fake_upstream import FakeUpstream
+
+def make_store(populations, names=("France", "Germany")):
+    return CountryStore(
+        names=list(names),
+        flags=[f"{name[:2].lower()}.png" for name in names],
+        populations=populations,
+        regions=["Europe"] * len(names),
+        capitals=[None] * len(names),
+        areas=[None] * len(names),
+        codes=[None] * len(names)
+    )
+
+def parse(chunk: bytes) -> dict:
+    """Fields of one encoded SSE event"""
+    fields = dict(line.split(": ", 1) for line in chunk.decode().strip().split("\n"))
+    if "data" in fields:
+        fields["data"] = json.loads(fields["data"])
+    return fields
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def next_event(stream):
+    return await asyncio.wait_for(stream.__anext__(), 1.0)
+
+class TestDiffStores:
+    """Test suite for per-country deltas"""
+
+    def test_reports_adds_updates_and_removes(self):
+        """Test that only changed fields are reported"""
+        old = make_store([67000000, 83000000])
+        new = make_store([68000000, 1000], names=("France", "Spain"))
+
+        changes = diff_stores(old, new)
+
+        assert changes == [
+            {"op": "update", "name": "France", "population": 68000000},
+            {"op": "add", "name": "Spain", "flag": "sp.png", "population": 1000, "region": "Europe"},
+            {"op": "remove", "name": "Germany"},
+        ]
+
+    def test_identical_stores_have_no_changes(self):
+        """Test that an unchanged dataset yields no deltas"""
+        assert diff_stores(make_store([1, 2]), make_store([1, 2])) == []
+
+class TestChangeFeed:
+    """Test suite for the change log and its SSE fan-out"""
+
+    @pytest.mark.asyncio
+    async def test_new_subscriber_gets_current_version(self):
+        """Test that a fresh connection starts with the current version"""
+        feed = ChangeFeed()
+        feed.publish("v1")
+        stream = feed.stream()
+
+        assert (await next_event(stream)).startswith(b"retry:")
+        event = parse(await next_event(stream))
+
+        assert event["event"] == "version"
+        assert event["data"]["version"] == "v1"
+        await stream.aclose()
+
+    @pytest.mark.asyncio
+    async def test_publish_fans_out_to_every_subscriber(self):
+        """Test that one publish reaches all waiting subscribers"""
+        feed = ChangeFeed()
+        feed.publish("v1")
+        streams = [feed.stream() for _ in range(100)]
+        for stream in streams:
+            await next_event(stream)
+            await next_event(stream)
+        waiting = [asyncio.ensure_future(next_event(stream)) for stream in streams]
+        await asyncio.sleep(0)
+
+        feed.publish("v2", [{"op": "update", "name": "France", "population": 1}])
+
+        events = [parse(event) for event in await asyncio.gather(*waiting)]
+        assert {event["event"] for event in events} == {"version"}
+        assert {event["data"]["previous"] for event in events} == {"v1"}
+        deltas = [parse(await next_event(stream)) for stream in streams]
+        assert deltas[0]["event"] == "delta"
+        assert deltas[0]["data"]["changes"][0]["name"] == "France"
+        assert feed.subscribers == 100
+        for stream in streams:
+            await stream.aclose()
+        assert feed.subscribers == 0
+
+    @pytest.mark.asyncio
+    async def test_resumes_after_last_event_id(self):
+        """Test that a reconnecting client gets exactly the events it missed"""
+        feed = ChangeFeed()
+        feed.publish("v1")
+        seen = feed.last_event_id
+        feed.publish("v2", [{"op": "remove", "name": "Germany"}])
+
+        stream = feed.stream(seen)
+        await next_event(stream)
+        missed = [parse(await next_event(stream)) for _ in range(2)]
+
+        assert [event["event"] for event in missed] == ["version", "delta"]
+        assert missed[-1]["id"] == feed.last_event_id
+        await stream.aclose()
+
+    @pytest.mark.asyncio
+    async def test_resets_when_log_no_longer_covers_client(self):
+        """Test that clients too far behind, or from another process, are told to refetch"""
+        feed = ChangeFeed(max_events=2)
+        feed.publish("v1")
+        seen = feed.last_event_id
+        for version in ("v2", "v3"):
+            feed.publish(version, [{"op": "remove", "name": version}])
+
+        assert feed.since(seen) is None
+        assert feed.since("other-1") is None
+        assert feed.since(feed.last_event_id) == []
+
+        stream = feed.stream(seen)
+        await next_event(stream)
+        event = parse(await next_event(stream))
+        assert event["event"] == "reset"
+        assert event["data"]["version"] == "v3"
+        await stream.aclose()
+
+    @pytest.mark.asyncio
+    async def test_sends_keepalive_when_idle(self):
+        """Test that idle connections get heartbeat comments"""
+        feed = ChangeFeed(heartbeat=0.01)
+        feed.publish("v1")
+        stream = feed.stream()
+        await next_event(stream)
+        await next_event(stream)
+
+        assert await next_event(stream) == b": keepalive\n\n"
+        await stream.aclose()
+
+class TestServiceRefresh:
+    """Test suite for change events produced by dataset reloads"""
+
+    @pytest.mark.asyncio
+    async def test_refresh_publishes_version_and_deltas(self):
+        """Test that a reload with new data reaches subscribers as a delta"""
+        def listing(population):
+            countries = [{"name": {"common": "France"}, "flags": {"png": "fr.png"}, "population": population, "cca3": "FRA"}]
+            body = json.dumps(countries).encode()
+            return {f"/all?fields={fields}": (200, "application/json", body) for fields in FIELD_GROUPS}
+
+        with FakeUpstream(listing(67000000)) as upstream:
+            service = CountryService(UpstreamPool([HttpSource("primary", upstream.url)]))
+            stream = await service.get_changes()
+            await next_event(stream)
+            initial = parse(await next_event(stream))
+
+            await service.get_store(force=True)  # unchanged: nothing published
+            upstream.routes.update(listing(68000000))
+            await service.get_store(force=True)
+
+            version, delta = parse(await next_event(stream)), parse(await next_event(stream))
+            await stream.aclose()
+
+        assert version["event"] == "version"
+        assert version["data"]["previous"] == initial["data"]["version"]
+        assert delta["data"]["changes"] == [{"op": "update", "name": "France", "population": 68000000}]
+
+class TestChangesEndToEnd:
+    """Test suite for /countries/changes on a running server"""
+
+    def test_stream_over_http(self):
+        """Test routing, headers and the first event against a real server"""
+        port = free_port()
+        environment = dict(
+            os.environ,
+            UPSTREAM_URLS="http://127.0.0.1:%d" % free_port(),  # nothing listens there
+            FLAG_ATLAS_AUTOBUILD="false",
+        )
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=environment,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            for _ in range(200):
+                try:
+                    httpx.get("http://127.0.0.1:%d/health" % port)
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.05)
+
+            url = "http://127.0.0.1:%d/countries/changes" % port
+            with httpx.stream("GET", url, timeout=10.0) as response:
+                assert response.status_code == 200
+                assert response.headers["content-type"].startswith("text/event-stream")
+                assert response.headers["cache-control"] == "no-cache"
+                lines = response.iter_lines()
+                assert next(lines).startswith("retry:")
+                next(lines)
+                assert next(lines).startswith("id: ")
+                assert next(lines) == "event: version"
+                assert json.loads(next(lines)[len("data: "):])["version"]
+        finally:
+            process.terminate()
+            process.wait()
@@ -0,0 +1,23 @@
+import subprocess
+import sys
+from benchmarks.cold_start import BACKEND_DIR, DEFAULT_BUDGET_MS, measure_cold_start
+
+def test_cold_start_within_budget():
+    """Test that a fresh server answers its first request within the budget"""
+    elapsed_ms = measure_cold_start()
+
+    assert elapsed_ms <= DEFAULT_BUDGET_MS, (
+        f"cold start took {elapsed_ms:.0f}ms, budget is {DEFAULT_BUDGET_MS:.0f}ms"
+    )
+
+def test_app_import_defers_heavy_modules():
+    """Test that importing the app does not pull in the HTTP client or numpy"""
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, app.main; print('httpx' in sys.modules or 'numpy' in sys.modules)"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.strip() == "False"
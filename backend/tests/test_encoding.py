@@ -0,0 +1,90 @@
+import json
+import msgpack
+from app.encoding import (
+    COLUMNAR_JSON,
+    COLUMNAR_MSGPACK,
+    JSON,
+    MSGPACK,
+    EncodedPayloadCache,
+    negotiate,
+    to_columns,
+)
+from app.models import Country
+
+SUPPORTED = [JSON, COLUMNAR_JSON, MSGPACK, COLUMNAR_MSGPACK]
+
+COUNTRIES = [
+    Country(name="France", flag="https://flagcdn.com/w320/fr.png", population=67391582, region="Europe"),
+    Country(name="Japan", flag="https://flagcdn.com/w320/jp.png", population=125836021, region="Asia"),
+]
+
+class TestNegotiate:
+    """Test suite for Accept header negotiation"""
+
+    def test_defaults_to_json(self):
+        """Test that a missing or wildcard Accept header yields JSON"""
+        assert negotiate(None, SUPPORTED) == JSON
+        assert negotiate("*/*", SUPPORTED) == JSON
+
+    def test_picks_exact_match(self):
+        """Test that explicitly requested formats are honoured"""
+        assert negotiate(MSGPACK, SUPPORTED) == MSGPACK
+        assert negotiate("application/x-msgpack", SUPPORTED) == MSGPACK
+        assert negotiate(f"{COLUMNAR_JSON}, */*;q=0.1", SUPPORTED) == COLUMNAR_JSON
+
+    def test_respects_quality(self):
+        """Test that q-values decide between acceptable formats"""
+        accept = f"{JSON};q=0.5, {COLUMNAR_MSGPACK};q=0.9"
+        assert negotiate(accept, SUPPORTED) == COLUMNAR_MSGPACK
+
+    def test_unsupported_returns_none(self):
+        """Test that unacceptable requests are reported"""
+        assert negotiate("text/csv", SUPPORTED) is None
+        assert negotiate(f"{MSGPACK};q=0", SUPPORTED) is None
+
+class TestEncodedPayloadCache:
+    """Test suite for pre-encoded payloads"""
+
+    def test_columnar_layout(self):
+        """Test that columns are parallel arrays per field"""
+        payload = to_columns(COUNTRIES)
+
+        assert payload["count"] == 2
+        assert payload["columns"]["name"] == ["France", "Japan"]
+        assert payload["columns"]["population"] == [67391582, 125836021]
+
+    def test_formats_decode_to_same_data(self):
+        """Test that every format round-trips the same countries"""
+        cache = EncodedPayloadCache()
+        rows = [country.model_dump() for country in COUNTRIES]
+
+        assert json.loads(cache.get(COUNTRIES, JSON)[0]) == rows
+        assert msgpack.unpackb(cache.get(COUNTRIES, MSGPACK)[0]) == rows
+        columnar = json.loads(cache.get(COUNTRIES, COLUMNAR_JSON)[0])
+        assert columnar == msgpack.unpackb(cache.get(COUNTRIES, COLUMNAR_MSGPACK)[0])
+
+    def test_encodes_once_per_dataset(self):
+        """Test that payloads are reused until the dataset changes"""
+        cache = EncodedPayloadCache()
+
+        body, etag = cache.get(COUNTRIES, JSON)
+        assert cache.get(COUNTRIES, JSON)[0] is body
+
+        reloaded = list(COUNTRIES)
+        new_body, new_etag = cache.get(reloaded, JSON)
+        assert new_body is not body
+        assert new_etag == etag  # same content, same strong ETag
+
+    def test_localised_bodies_share_the_list(self):
+        """Test that each language is encoded once from the same list with its own names"""
+        cache = EncodedPayloadCache()
+
+        english = cache.get(COUNTRIES, JSON)
+        german = cache.get(COUNTRIES, JSON, "deu", ["Frankreich", "Japan"])
+        columnar = json.loads(cache.get(COUNTRIES, COLUMNAR_JSON, "deu", ["Frankreich", "Japan"])[0])
+
+        assert [row["name"] for row in json.loads(german[0])] == ["Frankreich", "Japan"]
+        assert cache.get(COUNTRIES, JSON, "deu", ["Frankreich", "Japan"]) is german
+        assert columnar["columns"]["name"] == ["Frankreich", "Japan"]
+        assert german[1] != english[1]
+        assert cache.get(COUNTRIES, JSON) is english
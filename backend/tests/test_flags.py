@@ -0,0 +1,283 @@
+import asyncio
+import io
+import pytest
+from PIL import Image
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, patch
+from app.controllers import CountryController
+from app.services import CountryService
+from app.flags import FlagCache
+from app.main import app
+from app.store import CountryStore
+from tests.fake_upstream import FakeUpstream
+
+FRANCE_PNG = b"\x89PNG\r\n\x1a\n" + b"fr" * 100
+GERMANY_PNG = b"\x89PNG\r\n\x1a\n" + b"de" * 100
+
+def png(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (30, 20), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+@pytest.fixture
+def upstream():
+    """Fake flag CDN serving two images, one of them under two URLs"""
+    routes = {
+        "/fr.png": (200, "image/png", FRANCE_PNG),
+        "/fr-copy.png": (200, "image/png", FRANCE_PNG),
+        "/de.png": (200, "image/png", GERMANY_PNG),
+        "/es.png": (200, "image/png", png("red")),
+        "/it.png": (200, "image/png", png("green")),
+    }
+    with FakeUpstream(routes) as server:
+        yield server
+
+class TestFlagCache:
+    """Test suite for the content-addressed flag cache"""
+
+    @pytest.mark.asyncio
+    async def test_fetches_once_and_serves_from_disk(self, upstream, tmp_path):
+        """Test that repeated lookups do not go upstream again"""
+        cache = FlagCache(str(tmp_path), max_bytes=10_000)
+
+        first = await cache.get(upstream.url + "/fr.png")
+        second = await cache.get(upstream.url + "/fr.png")
+
+        assert first == second
+        assert first.media_type == "image/png"
+        with open(first.path, "rb") as file:
+            assert file.read() == FRANCE_PNG
+        assert upstream.requests == ["/fr.png"]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_download(self, upstream, tmp_path):
+        """Test that simultaneous requests for one image fetch it once"""
+        cache = FlagCache(str(tmp_path), max_bytes=10_000)
+
+        results = await asyncio.gather(*[cache.get(upstream.url + "/de.png") for _ in range(10)])
+
+        assert len({flag.digest for flag in results}) == 1
+        assert upstream.requests == ["/de.png"]
+
+    @pytest.mark.asyncio
+    async def test_identical_images_share_one_object(self, upstream, tmp_path):
+        """Test that storage is addressed by content, not URL"""
+        cache = FlagCache(str(tmp_path), max_bytes=10_000)
+
+        original = await cache.get(upstream.url + "/fr.png")
+        copy = await cache.get(upstream.url + "/fr-copy.png")
+
+        assert original.path == copy.path
+        assert cache.size == len(FRANCE_PNG)
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_served(self, upstream, tmp_path):
+        """Test that the cache stays within its size bound"""
+        cache = FlagCache(str(tmp_path), max_bytes=len(FRANCE_PNG) + 10)
+
+        france = await cache.get(upstream.url + "/fr.png")
+        await cache.get(upstream.url + "/de.png")
+
+        assert cache.size == len(GERMANY_PNG)
+        assert not (tmp_path / france.path).exists()
+        await cache.get(upstream.url + "/fr.png")
+        assert upstream.requests == ["/fr.png", "/de.png", "/fr.png"]
+
+    @pytest.mark.asyncio
+    async def test_pinned_images_are_not_evicted(self, upstream, tmp_path):
+        """Test that an image being served survives eviction until released"""
+        cache = FlagCache(str(tmp_path), max_bytes=len(FRANCE_PNG) + 10)
+
+        france = await cache.get(upstream.url + "/fr.png", pin=True)
+        await cache.get(upstream.url + "/de.png")
+
+        assert (tmp_path / france.path).exists()
+        cache.release(france.digest)
+        await asyncio.gather(*cache._removals)
+        assert not (tmp_path / france.path).exists()
+        assert cache.size == len(GERMANY_PNG)
+
+    @pytest.mark.asyncio
+    async def test_lookup_after_concurrent_eviction_refetches(self, upstream, tmp_path):
+        """Test that a waiter whose download was evicted before it resumed gets a live file"""
+        cache = FlagCache(str(tmp_path), max_bytes=len(FRANCE_PNG) + 10)
+
+        france, germany = await asyncio.gather(
+            cache.get(upstream.url + "/fr.png", pin=True),
+            cache.get(upstream.url + "/de.png", pin=True),
+        )
+
+        for flag in (france, germany):
+            with open(flag.path, "rb") as file:
+                assert file.read()
+            cache.release(flag.digest)
+
+    @pytest.mark.asyncio
+    async def test_index_survives_restart(self, upstream, tmp_path):
+        """Test that a new cache over the same directory reuses stored images"""
+        await FlagCache(str(tmp_path), max_bytes=10_000).get(upstream.url + "/fr.png")
+
+        restarted = FlagCache(str(tmp_path), max_bytes=10_000)
+        flag = await restarted.get(upstream.url + "/fr.png")
+
+        assert flag.digest
+        assert upstream.requests == ["/fr.png"]
+
+    @pytest.mark.asyncio
+    async def test_restart_over_a_smaller_bound_evicts(self, upstream, tmp_path):
+        """Test that a restored index is trimmed to the new size bound, URLs included"""
+        first = FlagCache(str(tmp_path), max_bytes=10_000)
+        france = await first.get(upstream.url + "/fr.png")
+        await first.get(upstream.url + "/de.png")
+
+        restarted = FlagCache(str(tmp_path), max_bytes=len(GERMANY_PNG) + 10)
+        await restarted.get(upstream.url + "/de.png")
+        await asyncio.gather(*restarted._removals)
+
+        assert not (tmp_path / france.path).exists()
+        await restarted.get(upstream.url + "/fr.png")
+        assert upstream.requests == ["/fr.png", "/de.png", "/fr.png"]
+
+@pytest.fixture
+def client(upstream, tmp_path):
+    """Client for the app with a dataset whose flags point at the fake upstream"""
+    store = CountryStore(
+        names=["France", "Germany", "Spain", "Italy"],
+        flags=[upstream.url + path for path in ("/fr.png", "/missing.png", "/es.png", "/it.png")],
+        populations=[67391582, 83240525, 47351567, 59554023],
+        regions=["Europe"] * 4,
+        capitals=["Paris", "Berlin", "Madrid", "Rome"],
+        areas=[551695.0, 357022.0, 505992.0, 301336.0],
+        codes=["FR", "DE", "ES", "IT"],
+        cca3=["FRA", "DEU", "ESP", "ITA"]
+    )
+    controller = CountryController()
+    controller.country_service.flag_cache = FlagCache(str(tmp_path), max_bytes=10_000)
+    previous = getattr(app.state, "country_controller", None)
+    app.state.country_controller = controller
+    with patch('app.services.CountryService.get_store', new_callable=AsyncMock) as mock_service:
+        mock_service.return_value = store
+        yield TestClient(app)
+    app.state.country_controller = previous
+
+class TestFlagRoute:
+    """Test suite for the /flags/{code} endpoint"""
+
+    def test_serves_image_with_immutable_caching(self, client, upstream):
+        """Test that the image is served with a strong ETag and long-lived caching"""
+        response = client.get("/flags/fr")
+
+        assert response.status_code == 200
+        assert response.content == FRANCE_PNG
+        assert response.headers["content-type"] == "image/png"
+        assert response.headers["etag"].startswith('"')
+        assert "immutable" in response.headers["cache-control"]
+
+        assert client.get("/flags/FRA").headers["etag"] == response.headers["etag"]
+        assert upstream.requests == ["/fr.png"]
+        # Served responses unpin their file
+        assert client.app.state.country_controller.country_service.flag_cache._pins == {}
+
+    def test_not_modified(self, client):
+        """Test that a matching If-None-Match returns 304 without a body"""
+        etag = client.get("/flags/fr").headers["etag"]
+
+        response = client.get("/flags/fr", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert client.app.state.country_controller.country_service.flag_cache._pins == {}
+
+    def test_errors(self, client):
+        """Test invalid codes, unknown countries and upstream failures"""
+        assert client.get("/flags/f1").status_code == 400
+        assert client.get("/flags/zz").status_code == 404
+        assert client.get("/flags/de").status_code == 502
+
+class TestFlagAtlasRoute:
+    """Test suite for the /flags/atlas endpoint"""
+
+    def test_atlas_and_country_sprites(self, client):
+        """Test that the atlas is served and /countries then carries sprite offsets"""
+        assert client.get("/countries").json()[0]["sprite"] is None
+
+        response = client.get("/flags/atlas")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/png"
+        countries = {country["name"]: country for country in client.get("/countries").json()}
+        # France's fake bytes do not decode and Germany's flag is missing upstream
+        assert countries["France"]["sprite"] is None
+        assert countries["Germany"]["sprite"] is None
+        spain, italy = countries["Spain"]["sprite"], countries["Italy"]["sprite"]
+        assert (spain["x"], spain["y"], italy["x"], italy["y"]) == (0, 0, 96, 0)
+
+        with Image.open(io.BytesIO(response.content)) as atlas:
+            assert atlas.size == (spain["atlas_width"], spain["atlas_height"])
+            assert atlas.getpixel((spain["x"] + 10, spain["y"] + 10))[:3] == (255, 0, 0)
+            assert atlas.getpixel((italy["x"] + 10, italy["y"] + 10))[:3] == (0, 128, 0)
+
+    def test_atlas_by_digest(self, client):
+        """Test that sprites point at an immutable, content-addressed atlas URL"""
+        current = client.get("/flags/atlas")
+        countries = {country["name"]: country for country in client.get("/countries").json()}
+        atlas_url = countries["Spain"]["sprite"]["atlas_url"]
+        digest = current.headers["etag"].strip('"')
+
+        response = client.get(atlas_url)
+
+        assert atlas_url == f"/flags/atlas/{digest}.png"
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+        assert response.content == current.content
+        assert client.get("/flags/atlas/" + "0" * 64 + ".png").status_code == 404
+
+    def test_atlas_not_modified(self, client):
+        """Test that the atlas honours If-None-Match"""
+        etag = client.get("/flags/atlas").headers["etag"]
+
+        response = client.get("/flags/atlas", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+
+class TestAtlasBuild:
+    """Test suite for atlas persistence, retries and cleanup"""
+
+    @pytest.mark.asyncio
+    async def test_incomplete_atlas_is_retried_then_persisted(self, upstream, tmp_path):
+        """Test that missing flags keep the atlas out of disk reuse until a retry completes it"""
+        store = CountryStore(
+            names=["Spain", "Italy"],
+            flags=[upstream.url + "/es.png", upstream.url + "/pt.png"],
+            populations=[47351567, 10295909],
+            regions=["Europe"] * 2,
+            capitals=["Madrid", "Lisbon"],
+            areas=[505992.0, 92090.0],
+            codes=["ES", "PT"]
+        )
+        service = CountryService()
+        service.flag_cache = FlagCache(str(tmp_path), max_bytes=10_000)
+        service.atlas_retry = 0.05
+        directory = tmp_path / "atlas"
+        directory.mkdir()
+        (directory / "old.png").write_bytes(b"")
+        (directory / "old.json").write_bytes(b"{}")
+
+        with patch('app.services.CountryService.get_store', new_callable=AsyncMock) as mock_service:
+            mock_service.return_value = store
+            partial = await service.get_atlas()
+
+            assert not partial.complete
+            assert not (directory / f"{store.version}.json").exists()
+            assert service.flag_cache._pins == {}
+
+            upstream.routes["/pt.png"] = (200, "image/png", png("blue"))
+            for _ in range(100):
+                await asyncio.sleep(0.05)
+                if service._atlas.complete:
+                    break
+
+        assert service._atlas.complete
+        assert sorted(p.name for p in directory.iterdir()) == [
+            f"{store.version}.json", f"{store.version}.png"
+        ]
@@ -0,0 +1,85 @@
+import math
+import random
+import pytest
+from app.geo import EARTH_RADIUS_KM, GeoIndex
+from app.store import CountryStore
+
+def make_store(rows):
+    """Build a store from (name, cca3, latlng, borders) tuples"""
+    return CountryStore(
+        names=[row[0] for row in rows],
+        flags=[f"{row[0]}.png" for row in rows],
+        populations=[1] * len(rows),
+        regions=[None] * len(rows),
+        capitals=[None] * len(rows),
+        areas=[None] * len(rows),
+        codes=[None] * len(rows),
+        cca3=[row[1] for row in rows],
+        latlngs=[row[2] for row in rows],
+        borders=[row[3] for row in rows],
+    )
+
+def haversine(a, b):
+    lat1, lng1, lat2, lng2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+@pytest.fixture
+def index():
+    return GeoIndex(make_store([
+        ("France", "FRA", (46.0, 2.0), ("BEL", "DEU", "ESP", "XXX")),
+        ("Germany", "DEU", (51.0, 9.0), ("FRA", "BEL")),
+        ("Belgium", "BEL", (50.83, 4.0), ("FRA", "DEU")),
+        ("Spain", "ESP", (40.0, -4.0), ("FRA",)),
+        ("Japan", "JPN", (36.0, 138.0), ()),
+        ("Atlantis", "ATL", None, ()),
+    ]))
+
+class TestGeoIndex:
+    """Test suite for nearest-neighbour, radius and border queries"""
+
+    def test_neighbors_resolve_known_codes(self, index):
+        """Test that borders map to rows and unknown codes are dropped"""
+        assert [index.store[row].name for row in index.neighbors(0)] == ["Belgium", "Germany", "Spain"]
+        assert index.neighbors(4) == ()
+
+    def test_nearest_ordered_by_distance(self, index):
+        """Test that the k nearest countries come back nearest first"""
+        result = index.nearest(0, 3)
+
+        assert [index.store[row].name for row, _ in result] == ["Belgium", "Germany", "Spain"]
+        assert result[0][1] == pytest.approx(haversine((46.0, 2.0), (50.83, 4.0)), rel=1e-6)
+
+    def test_nearest_excludes_self_and_missing_coordinates(self, index):
+        """Test that a country is not its own neighbour and rows without coordinates are skipped"""
+        rows = [row for row, _ in index.nearest(0, 10)]
+
+        assert 0 not in rows
+        assert 5 not in rows
+        assert len(rows) == 4
+        assert index.nearest(5, 3) == []
+
+    def test_within_radius(self, index):
+        """Test that radius queries return only countries within the distance"""
+        result = index.within(0, 1000)
+
+        assert [index.store[row].name for row, _ in result] == ["Belgium", "Germany", "Spain"]
+        assert all(distance <= 1000 for _, distance in result)
+        assert index.within(4, 1000) == []
+
+    def test_matches_brute_force_on_random_points(self):
+        """Test nearest and radius queries against a pure Python scan"""
+        rng = random.Random(5)
+        points = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(500)]
+        geo = GeoIndex(make_store([(f"p{i}", f"P{i}", p, ()) for i, p in enumerate(points)]))
+
+        for origin in (0, 17, 250):
+            expected = sorted(
+                (haversine(points[origin], p), i) for i, p in enumerate(points) if i != origin
+            )
+            nearest = geo.nearest(origin, 5)
+            assert [row for row, _ in nearest] == [i for _, i in expected[:5]]
+            assert [d for _, d in nearest] == pytest.approx([d for d, _ in expected[:5]], rel=1e-6)
+
+            within = geo.within(origin, 2000)
+            assert [row for row, _ in within] == [i for d, i in expected if d <= 2000]
@@ -0,0 +1,155 @@
+import json
+import logging
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app import logging_config
+from app.logging_config import (
+    AccessLogMiddleware,
+    JsonFormatter,
+    SamplingFilter,
+    configure_logging,
+    note_access,
+)
+
+class ListHandler(logging.Handler):
+    """Handler collecting formatted records, optionally slowly"""
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__()
+        self.delay = delay
+        self.lines = []
+
+    def emit(self, record):
+        time.sleep(self.delay)
+        self.lines.append(self.format(record))
+
+@pytest.fixture
+def restore_root_logger():
+    """Fixture restoring the root logger after a test reconfigures it"""
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    listener = logging_config._listener
+    yield
+    root.handlers[:] = handlers
+    root.setLevel(level)
+    # Reconfiguring stopped the listener behind the restored queue handler
+    logging_config._listener = listener
+    if listener is not None and listener._thread is None:
+        listener.start()
+
+def make_record(msg, *args, level=logging.INFO, **extra):
+    record = logging.LogRecord("test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+class TestJsonFormatter:
+    """Test suite for the JSON log formatter"""
+
+    def test_formats_message_and_extra_fields(self):
+        """Test that the message is formatted lazily and extras become fields"""
+        line = JsonFormatter().format(make_record("loaded %d countries", 250, cache="miss"))
+
+        payload = json.loads(line)
+        assert payload["message"] == "loaded 250 countries"
+        assert payload["level"] == "INFO"
+        assert payload["cache"] == "miss"
+
+class TestSamplingFilter:
+    """Test suite for log sampling"""
+
+    def test_samples_flagged_records(self):
+        """Test that flagged records are kept one in `every`"""
+        sampler = SamplingFilter(every=10)
+
+        kept = sum(sampler.filter(make_record("noisy %s", i, sample=True)) for i in range(100))
+
+        assert kept == 10
+
+    def test_unflagged_and_error_records_always_pass(self):
+        """Test that only flagged, non-error records are sampled"""
+        sampler = SamplingFilter(every=10)
+
+        assert all(sampler.filter(make_record("plain")) for _ in range(5))
+        assert all(
+            sampler.filter(make_record("boom", level=logging.ERROR, sample=True)) for _ in range(5)
+        )
+
+class TestConfigureLogging:
+    """Test suite for queue-based logging setup"""
+
+    def test_logging_does_not_block_on_slow_sink(self, restore_root_logger):
+        """Test that logging returns before a slow handler has written"""
+        sink = ListHandler(delay=0.01)
+        listener = configure_logging(level="INFO", handler=sink)
+        try:
+            start = time.perf_counter()
+            for i in range(20):
+                logging.getLogger("app.test").info("line %d", i)
+            elapsed = time.perf_counter() - start
+
+            # 20 synchronous writes would take at least 200ms
+            assert elapsed < 0.1
+        finally:
+            listener.stop()
+
+        assert len(sink.lines) == 20
+        assert json.loads(sink.lines[-1])["message"] == "line 19"
+
+    def test_reconfiguring_stops_previous_listener(self, restore_root_logger):
+        """Test that replacing the queue handler flushes and stops its listener thread"""
+        first_sink, second_sink = ListHandler(), ListHandler()
+        first = configure_logging(level="INFO", handler=first_sink)
+        logging.getLogger("app.test").info("before")
+        second = configure_logging(level="INFO", handler=second_sink)
+        try:
+            logging.getLogger("app.test").info("after")
+        finally:
+            second.stop()
+
+        assert first._thread is None
+        assert [json.loads(line)["message"] for line in first_sink.lines] == ["before"]
+        assert [json.loads(line)["message"] for line in second_sink.lines] == ["after"]
+
+class TestAccessLogMiddleware:
+    """Test suite for structured access logging"""
+
+    def build_client(self, sample_every=1):
+        test_app = FastAPI()
+
+        @test_app.get("/countries")
+        async def countries():
+            note_access(cache="hit")
+            return []
+
+        test_app.add_middleware(AccessLogMiddleware, sample_every=sample_every)
+        return TestClient(test_app)
+
+    def test_logs_timing_and_cache_fields(self, caplog):
+        """Test that access lines include status, timing and cache status"""
+        client = self.build_client()
+
+        with caplog.at_level(logging.INFO, logger="app.access"):
+            client.get("/countries")
+
+        record = [r for r in caplog.records if r.name == "app.access"][-1]
+        assert record.getMessage() == "GET /countries 200"
+        assert record.status == 200
+        assert record.cache == "hit"
+        assert record.duration_ms >= 0
+        assert record.bytes == 2
+
+    def test_samples_successes_but_not_errors(self, caplog):
+        """Test that successful requests are sampled and errors are not"""
+        client = self.build_client(sample_every=5)
+
+        with caplog.at_level(logging.INFO, logger="app.access"):
+            for _ in range(10):
+                client.get("/countries")
+            for _ in range(3):
+                client.get("/not-a-route")
+
+        statuses = [record.status for record in caplog.records if record.name == "app.access"]
+        assert statuses.count(200) == 2
+        assert statuses.count(404) == 3
@@ -55,6 +55,58 @@ async def test_get_countries_service_error():
         response = client.get("/countries")
         assert response.status_code == 502
 
+@pytest.mark.asyncio
+async def test_get_countries_content_negotiation():
+    """Test that /countries honours Accept for compact formats"""
+    import msgpack
+    mock_countries = [
+        Country(name="France", flag="https://flagcdn.com/w320/fr.png", population=67391582),
+        Country(name="Germany", flag="https://flagcdn.com/w320/de.png", population=83240525)
+    ]
+    
+    with patch('app.services.CountryService.get_all_countries', new_callable=AsyncMock) as mock_service:
+        mock_service.return_value = mock_countries
+        
+        response = client.get("/countries", headers={"Accept": "application/msgpack"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(response.content)[1]["name"] == "Germany"
+        
+        response = client.get(
+            "/countries", headers={"Accept": "application/vnd.flagexplorer.columnar+json"}
+        )
+        assert response.status_code == 200
+        assert response.json()["columns"]["name"] == ["France", "Germany"]
+        
+        response = client.get("/countries", headers={"Accept": "text/csv"})
+        assert response.status_code == 406
+
+@pytest.mark.asyncio
+async def test_get_countries_not_modified():
+    """Test that a matching If-None-Match yields 304"""
+    mock_countries = [
+        Country(name="France", flag="https://flagcdn.com/w320/fr.png", population=67391582)
+    ]
+    
+    with patch('app.services.CountryService.get_all_countries', new_callable=AsyncMock) as mock_service:
+        mock_service.return_value = mock_countries
+        
+        etag = client.get("/countries").headers["etag"]
+        response = client.get("/countries", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+@pytest.mark.asyncio
+async def test_get_countries_localised():
+    """Test that ?lang= is passed through to the service"""
+    with patch('app.services.CountryService.get_encoded_countries', new_callable=AsyncMock) as mock_service:
+        mock_service.return_value = (b'[{"name":"Allemagne"}]', '"fr"')
+        
+        response = client.get("/countries?lang=fr")
+        
+        assert response.json()[0]["name"] == "Allemagne"
+        assert response.headers["etag"] == '"fr"'
+        mock_service.assert_called_once_with("application/json", "fr")
+
 @pytest.mark.asyncio 
 async def test_get_country_by_name_success():
     """Test successful retrieval of country details by name"""
@@ -114,4 +166,65 @@ def test_openapi_documentation():
     assert response.status_code == 200
     openapi_spec = response.json()
     assert openapi_spec["info"]["title"] == "Country API"
-    assert openapi_spec["info"]["version"] == "1.0.0" 
\ No newline at end of file
+    assert openapi_spec["info"]["version"] == "1.0.0"
+
+def test_get_stats():
+    """Test the aggregate statistics endpoint"""
+    from app.store import CountryStore
+    store = CountryStore(
+        names=["France", "Germany"],
+        flags=["fr.png", "de.png"],
+        populations=[67391582, 83240525],
+        regions=["Europe", "Europe"],
+        capitals=["Paris", "Berlin"],
+        areas=[551695.0, 357022.0],
+        codes=["FR", "DE"],
+        subregions=["Western Europe", "Western Europe"]
+    )
+    
+    with patch('app.services.CountryService.get_store', new_callable=AsyncMock) as mock_service:
+        mock_service.return_value = store
+        
+        response = client.get("/stats")
+        assert response.status_code == 200
+        
+        data = response.json()
+        assert data["version"] == store.version
+        assert data["regions"][0]["name"] == "Europe"
+        assert data["regions"][0]["total_population"] == 67391582 + 83240525
+        assert data["subregions"][0]["region"] == "Europe"
+
+def test_get_nearby_and_neighbors():
+    """Test the nearby and neighbors endpoints"""
+    from app.store import CountryStore
+    store = CountryStore(
+        names=["France", "Germany", "Spain"],
+        flags=["fr.png", "de.png", "es.png"],
+        populations=[67391582, 83240525, 47351567],
+        regions=["Europe", "Europe", "Europe"],
+        capitals=["Paris", "Berlin", "Madrid"],
+        areas=[551695.0, 357022.0, 505992.0],
+        codes=["FR", "DE", "ES"],
+        cca3=["FRA", "DEU", "ESP"],
+        latlngs=[(46.0, 2.0), (51.0, 9.0), (40.0, -4.0)],
+        borders=[("DEU", "ESP"), ("FRA",), ("FRA",)]
+    )
+    
+    with patch('app.services.CountryService.get_store', new_callable=AsyncMock) as mock_service:
+        mock_service.return_value = store
+        
+        response = client.get("/countries/spain/nearby?k=1")
+        assert response.status_code == 200
+        data = response.json()
+        assert [country["name"] for country in data] == ["France"]
+        assert data[0]["distance_km"] > 0
+        
+        response = client.get("/countries/germany/nearby?radius_km=1000")
+        assert [country["name"] for country in response.json()] == ["France"]
+        
+        response = client.get("/countries/france/neighbors")
+        assert response.status_code == 200
+        assert [country["name"] for country in response.json()] == ["Germany", "Spain"]
+        
+        assert client.get("/countries/atlantis/neighbors").status_code == 404
+        assert client.get("/countries/france/nearby?k=0").status_code == 422
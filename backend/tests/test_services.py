@@ -1,14 +1,19 @@
+import asyncio
+import json
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 import httpx
 from fastapi import HTTPException
+from app.encoding import JSON
 from app.services import CountryService
+from app.store import CountryStore
 from app.models import Country, CountryDetails
+from app.upstream import FIELD_GROUPS, HttpSource, UpstreamPool
 
 @pytest.fixture
 def country_service():
-    """Fixture to create a CountryService instance"""
-    return CountryService()
+    """Fixture to create a CountryService instance with a single upstream, so errors surface"""
+    return CountryService(UpstreamPool([HttpSource("primary", "https://restcountries.com/v3.1")]))
 
 @pytest.fixture
 def mock_countries_api_response():
@@ -21,7 +26,8 @@ def mock_countries_api_response():
             "capital": ["Paris"],
             "region": "Europe",
             "area": 551695.0,
-            "cca2": "FR"
+            "cca2": "FR",
+            "cca3": "FRA"
         },
         {
             "name": {"common": "Germany"},
@@ -30,7 +36,8 @@ def mock_countries_api_response():
             "capital": ["Berlin"],
             "region": "Europe", 
             "area": 357022.0,
-            "cca2": "DE"
+            "cca2": "DE",
+            "cca3": "DEU"
         }
     ]
 
@@ -233,4 +240,169 @@ class TestCountryService:
                 await country_service.get_country_by_name("france")
             
             assert exc_info.value.status_code == 500
-            assert "Internal server error" in exc_info.value.detail 
\ No newline at end of file
+            assert "Internal server error" in exc_info.value.detail 
+    @pytest.mark.asyncio
+    async def test_get_all_countries_served_from_cache(self, country_service, mock_countries_api_response):
+        """Test that a fresh country listing is not fetched twice"""
+        mock_response = MagicMock()
+        mock_response.json.return_value = mock_countries_api_response
+        mock_response.raise_for_status = MagicMock()
+        
+        with patch('httpx.AsyncClient') as mock_client:
+            mock_get = AsyncMock(return_value=mock_response)
+            mock_client.return_value.__aenter__.return_value.get = mock_get
+            
+            await country_service.get_all_countries()
+            countries = await country_service.get_all_countries()
+            
+            assert len(countries) == 2
+            assert mock_get.call_count == len(FIELD_GROUPS)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_fetch(self, country_service, mock_countries_api_response):
+        """Test that concurrent requests on a cold cache fetch the dataset once"""
+        mock_response = MagicMock()
+        mock_response.json.return_value = mock_countries_api_response
+        mock_response.raise_for_status = MagicMock()
+        
+        async def slow_get(url):
+            await asyncio.sleep(0.01)
+            return mock_response
+        
+        with patch('httpx.AsyncClient') as mock_client:
+            mock_get = AsyncMock(side_effect=slow_get)
+            mock_client.return_value.__aenter__.return_value.get = mock_get
+            
+            results = await asyncio.gather(*[country_service.get_all_countries() for _ in range(20)])
+            
+            assert mock_get.call_count == len(FIELD_GROUPS)
+            assert all(countries is results[0] for countries in results)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_failure(self, country_service):
+        """Test that a failed shared fetch is reported to every waiter and retried afterwards"""
+        async def failing_get(url):
+            await asyncio.sleep(0.01)
+            raise httpx.HTTPError("down")
+        
+        with patch('httpx.AsyncClient') as mock_client:
+            mock_get = AsyncMock(side_effect=failing_get)
+            mock_client.return_value.__aenter__.return_value.get = mock_get
+            
+            results = await asyncio.gather(
+                *[country_service.get_all_countries() for _ in range(5)], return_exceptions=True
+            )
+            assert [e.status_code for e in results] == [502] * 5
+            assert mock_get.call_count == 1
+            
+            with pytest.raises(HTTPException):
+                await country_service.get_all_countries()
+            assert mock_get.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_get_country_by_name_served_from_cache(self, country_service, mock_countries_api_response):
+        """Test that details for listed countries do not go upstream"""
+        mock_response = MagicMock()
+        mock_response.json.return_value = mock_countries_api_response
+        mock_response.raise_for_status = MagicMock()
+        
+        with patch('httpx.AsyncClient') as mock_client:
+            mock_get = AsyncMock(return_value=mock_response)
+            mock_client.return_value.__aenter__.return_value.get = mock_get
+            
+            await country_service.get_all_countries()
+            country = await country_service.get_country_by_name("germany")
+            
+            assert country.name == "Germany"
+            assert country.capital == "Berlin"
+            assert country.code == "DE"
+            assert mock_get.call_count == len(FIELD_GROUPS)
+
+    @pytest.mark.asyncio
+    async def test_encoded_countries_localised(self, country_service, mock_countries_api_response):
+        """Test that every language's body is encoded once, when the dataset loads"""
+        mock_countries_api_response[1]["translations"] = {"fra": {"official": "République fédérale d'Allemagne", "common": "Allemagne"}}
+        mock_response = MagicMock()
+        mock_response.json.return_value = mock_countries_api_response
+        mock_response.raise_for_status = MagicMock()
+        
+        with patch('httpx.AsyncClient') as mock_client:
+            mock_get = AsyncMock(return_value=mock_response)
+            mock_client.return_value.__aenter__.return_value.get = mock_get
+            
+            await country_service.get_store()
+            with patch.dict('app.encoding.ENCODERS', clear=True):
+                # Pre-encoded at load: nothing is encoded while serving
+                french, french_etag = await country_service.get_encoded_countries(JSON, "fr")
+                again, _ = await country_service.get_encoded_countries(JSON, "fra")
+                english, english_etag = await country_service.get_encoded_countries(JSON, "en")
+                default, _ = await country_service.get_encoded_countries(JSON)
+            
+            assert [country["name"] for country in json.loads(french)] == ["France", "Allemagne"]
+            assert again is french
+            assert json.loads(english)[1]["name"] == "Germany"
+            assert default is english
+            assert french_etag != english_etag
+            assert mock_get.call_count == len(FIELD_GROUPS)
+            
+            with pytest.raises(HTTPException) as exc_info:
+                await country_service.get_encoded_countries(JSON, "xx")
+            assert exc_info.value.status_code == 400
+            assert "fra" in exc_info.value.detail
+
+    @pytest.mark.asyncio
+    async def test_encoded_countries_localised_from_one_store(self, country_service, mock_countries_api_response):
+        """Test that localised names and rows come from the same dataset, fetched once"""
+        old = CountryStore.from_restcountries(mock_countries_api_response[:1])
+        mock_countries_api_response[1]["translations"] = {"fra": {"official": "République fédérale d'Allemagne", "common": "Allemagne"}}
+        new = CountryStore.from_restcountries(mock_countries_api_response)
+        country_service._store = old
+        
+        with patch('app.services.CountryService.get_store', new_callable=AsyncMock) as mock_store:
+            mock_store.return_value = new
+            
+            body, _ = await country_service.get_encoded_countries(JSON, "fr")
+            
+            assert [country["name"] for country in json.loads(body)] == ["France", "Allemagne"]
+            assert mock_store.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_get_country_by_translated_name(self, country_service, mock_countries_api_response):
+        """Test that a name only known in translation resolves without a name search"""
+        mock_countries_api_response[1]["translations"] = {"spa": {"official": "República Federal de Alemania", "common": "Alemania"}}
+        mock_response = MagicMock()
+        mock_response.json.return_value = mock_countries_api_response
+        mock_response.raise_for_status = MagicMock()
+        
+        with patch('httpx.AsyncClient') as mock_client:
+            mock_get = AsyncMock(return_value=mock_response)
+            mock_client.return_value.__aenter__.return_value.get = mock_get
+            
+            await country_service.get_all_countries()
+            country = await country_service.get_country_by_name("republica federal de alemania")
+            
+            assert country.name == "Germany"
+            assert mock_get.call_count == len(FIELD_GROUPS)
+
+    @pytest.mark.asyncio
+    async def test_get_country_by_translated_name_before_load(self, country_service, mock_countries_api_response):
+        """Test that a translated name unknown to the name search falls back to the dataset"""
+        mock_countries_api_response[1]["translations"] = {"ita": {"official": "Repubblica federale di Germania", "common": "Germania"}}
+        not_found = MagicMock()
+        not_found.status_code = 404
+        listing = MagicMock()
+        listing.json.return_value = mock_countries_api_response
+        listing.raise_for_status = MagicMock()
+        
+        async def get(url):
+            if "/name/" in url:
+                raise httpx.HTTPStatusError("Not found", request=MagicMock(), response=not_found)
+            return listing
+        
+        with patch('httpx.AsyncClient') as mock_client:
+            mock_client.return_value.__aenter__.return_value.get = AsyncMock(side_effect=get)
+            
+            country = await country_service.get_country_by_name("germania")
+            
+            assert country.name == "Germany"
+            assert country.capital == "Berlin"
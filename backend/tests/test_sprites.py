@@ -0,0 +1,72 @@
+import pytest
+from PIL import Image
+from app.sprites import build_atlas, load_atlas, remove_stale_atlases
+
+def write_flag(path, color, size=(30, 20)):
+    Image.new("RGB", size, color).save(path, format="PNG")
+    return str(path)
+
+@pytest.fixture
+def flag_paths(tmp_path):
+    """Three flag images and one missing row"""
+    return [
+        write_flag(tmp_path / "red.png", "red"),
+        None,
+        write_flag(tmp_path / "green.png", "green", size=(40, 20)),
+        write_flag(tmp_path / "blue.png", "blue"),
+    ]
+
+class TestBuildAtlas:
+    """Test suite for flag atlas generation"""
+
+    def test_packs_available_flags(self, flag_paths, tmp_path):
+        """Test that each readable flag gets a tile and missing rows are skipped"""
+        atlas = build_atlas(flag_paths, str(tmp_path / "atlas"), "v1",
+                            tile_width=12, tile_height=8, columns=2, workers=2)
+
+        assert atlas.offsets == {0: (0, 0), 2: (12, 0), 3: (0, 8)}
+        assert (atlas.width, atlas.height) == (24, 16)
+        with Image.open(atlas.path) as image:
+            assert image.size == (24, 16)
+            assert image.getpixel((6, 4))[:3] == (255, 0, 0)
+            assert image.getpixel((18, 4))[:3] == (0, 128, 0)
+            assert image.getpixel((6, 12))[:3] == (0, 0, 255)
+
+    def test_unreadable_image_is_skipped(self, tmp_path):
+        """Test that a corrupt image leaves its row out of the atlas"""
+        broken = tmp_path / "broken.png"
+        broken.write_bytes(b"not an image")
+        paths = [write_flag(tmp_path / "red.png", "red"), str(broken)]
+
+        atlas = build_atlas(paths, str(tmp_path / "atlas"), "v1", workers=1)
+
+        assert list(atlas.offsets) == [0]
+
+    def test_load_atlas_round_trip(self, flag_paths, tmp_path):
+        """Test that a complete atlas is reused from disk for the same version"""
+        directory = str(tmp_path / "atlas")
+        built = build_atlas([path for path in flag_paths if path], directory, "v1", workers=1)
+
+        assert built.complete
+        assert load_atlas(directory, "v1", rows=3) == built
+        assert load_atlas(directory, "v1", rows=4) is None
+        assert load_atlas(directory, "v2") is None
+
+    def test_incomplete_atlas_is_not_persisted(self, flag_paths, tmp_path):
+        """Test that an atlas with missing tiles can be served but is never reused"""
+        directory = tmp_path / "atlas"
+        atlas = build_atlas(flag_paths, str(directory), "v1", workers=1)
+
+        assert not atlas.complete
+        assert atlas.path.endswith(f"v1.{atlas.digest[:16]}.partial.png")
+        assert load_atlas(str(directory), "v1") is None
+        assert not (directory / "v1.json").exists()
+
+    def test_remove_stale_atlases(self, tmp_path):
+        """Test that only the given version's final files are kept"""
+        for name in ("v1.png", "v1.json", "v2.png", "v2.json", "v2.partial.png", "tmp123"):
+            (tmp_path / name).write_bytes(b"")
+
+        remove_stale_atlases(str(tmp_path), "v2")
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["tmp123", "v2.json", "v2.png"]
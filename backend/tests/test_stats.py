@@ -0,0 +1,106 @@
+import random
+import statistics
+import numpy as np
+import pytest
+from app.stats import DENSITY_PERCENTILES, compute_stats, group_stats, grouped_quantiles
+from app.store import CountryStore
+
+def make_store(rows):
+    """Build a store from (name, population, region, subregion, area) tuples"""
+    return CountryStore(
+        names=[row[0] for row in rows],
+        flags=[f"{row[0]}.png" for row in rows],
+        populations=[row[1] for row in rows],
+        regions=[row[2] for row in rows],
+        capitals=[None] * len(rows),
+        areas=[row[4] for row in rows],
+        codes=[None] * len(rows),
+        subregions=[row[3] for row in rows],
+    )
+
+@pytest.fixture
+def store():
+    return make_store([
+        ("France", 67_000_000, "Europe", "Western Europe", 551_695.0),
+        ("Germany", 83_000_000, "Europe", "Western Europe", 357_022.0),
+        ("Poland", 38_000_000, "Europe", "Central Europe", 312_679.0),
+        ("Japan", 125_000_000, "Asia", "Eastern Asia", 377_930.0),
+        ("Nowhere", 0, None, None, None),
+    ])
+
+class TestGroupedQuantiles:
+    """Test suite for the vectorised per-group quantiles"""
+
+    def test_matches_numpy_per_group(self):
+        """Test that grouped results equal numpy.quantile on each group"""
+        rng = np.random.default_rng(3)
+        codes = rng.integers(0, 5, size=1000).astype(np.int32)
+        values = rng.random(1000)
+        quantiles = [0.1, 0.5, 0.9]
+
+        result = grouped_quantiles(codes, values, 6, quantiles)
+
+        for group in range(5):
+            expected = np.quantile(values[codes == group], quantiles)
+            assert result[group] == pytest.approx(expected)
+        assert np.isnan(result[5]).all()  # empty group
+
+class TestGroupStats:
+    """Test suite for region and subregion statistics"""
+
+    def test_region_totals(self, store):
+        """Test counts, totals, mean and median per region"""
+        regions = {group["name"]: group for group in group_stats(store, "region")}
+
+        europe = regions["Europe"]
+        assert europe["count"] == 3
+        assert europe["total_population"] == 188_000_000
+        assert europe["mean_population"] == pytest.approx(188_000_000 / 3)
+        assert europe["median_population"] == 67_000_000
+        assert europe["total_area"] == pytest.approx(551_695 + 357_022 + 312_679)
+        assert regions["Asia"]["count"] == 1
+
+    def test_unknown_area_excluded_from_density(self, store):
+        """Test that rows without an area have no density"""
+        regions = {group["name"]: group for group in group_stats(store, "region")}
+
+        assert regions[None]["total_area"] == 0
+        assert regions[None]["density_percentiles"]["p50"] is None
+
+    def test_subregions_carry_parent_region(self, store):
+        """Test that subregion groups name their region"""
+        subregions = {group["name"]: group for group in group_stats(store, "subregion")}
+
+        assert subregions["Western Europe"]["region"] == "Europe"
+        assert subregions["Western Europe"]["median_population"] == 75_000_000
+        assert subregions["Eastern Asia"]["region"] == "Asia"
+
+    def test_matches_pure_python_on_random_data(self):
+        """Test the vectorised results against a straightforward implementation"""
+        rng = random.Random(11)
+        rows = [
+            (f"c{i}", rng.randint(0, 10**9), rng.choice("ABCD"), None, rng.uniform(1, 1e6))
+            for i in range(2000)
+        ]
+
+        for group in group_stats(make_store(rows), "region"):
+            members = [row for row in rows if row[2] == group["name"]]
+            populations = [row[1] for row in members]
+            densities = [row[1] / row[4] for row in members]
+            assert group["total_population"] == sum(populations)
+            assert group["median_population"] == pytest.approx(statistics.median(populations))
+            expected = np.percentile(densities, DENSITY_PERCENTILES)
+            actual = [group["density_percentiles"][f"p{p}"] for p in DENSITY_PERCENTILES]
+            assert actual == pytest.approx(expected)
+
+    def test_compute_stats_tagged_with_version(self, store):
+        """Test that results identify the dataset they were computed from"""
+        stats = compute_stats(store)
+
+        assert stats["version"] == store.version
+        assert len(stats["regions"]) == 3
+        assert len(stats["subregions"]) == 4
+
+    def test_empty_store(self):
+        """Test that an empty dataset yields no groups"""
+        assert compute_stats(make_store([]))["regions"] == []
@@ -0,0 +1,163 @@
+import math
+import sys
+import pytest
+from app.models import Country, CountryDetails
+from app.store import CountryRecord, CountryStore
+
+@pytest.fixture
+def restcountries_data():
+    """Raw records as returned by the REST Countries API"""
+    return [
+        {
+            "name": {"common": "France", "official": "French Republic"},
+            "flags": {"png": "https://flagcdn.com/w320/fr.png"},
+            "population": 67391582,
+            "capital": ["Paris"],
+            "region": "Europe",
+            "area": 551695.0,
+            "cca2": "FR",
+            "translations": {
+                "deu": {"official": "Französische Republik", "common": "Frankreich"},
+                "jpn": {"official": "フランス共和国", "common": "フランス"}
+            }
+        },
+        {
+            "name": {"common": "Antarctica"},
+            "flags": {"png": "https://flagcdn.com/w320/aq.png"},
+            "population": 1000,
+            "capital": [],
+            "region": "Antarctic",
+            "cca2": "AQ"
+        },
+        {
+            "name": {},  # Invalid name structure
+            "flags": {"png": "https://flagcdn.com/w320/invalid.png"}
+        },
+        {
+            "name": {"common": "Broken"},
+            "flags": {"png": "https://flagcdn.com/w320/xx.png"},
+            "population": "many"
+        }
+    ]
+
+class TestCountryStore:
+    """Test suite for the columnar country store"""
+
+    def test_from_restcountries_skips_invalid_records(self, restcountries_data):
+        """Test that only valid records become rows"""
+        store = CountryStore.from_restcountries(restcountries_data)
+
+        assert len(store) == 2
+        assert [record.name for record in store] == ["France", "Antarctica"]
+
+    def test_record_fields(self, restcountries_data):
+        """Test that record views expose every column"""
+        store = CountryStore.from_restcountries(restcountries_data)
+        france, antarctica = store[0], store[1]
+
+        assert france.population == 67391582
+        assert france.capital == "Paris"
+        assert france.area == 551695.0
+        assert france.code == "FR"
+        assert france.official_name == "French Republic"
+        assert antarctica.capital is None
+        assert antarctica.area is None
+        assert math.isnan(store.areas[1])
+
+    def test_find_code(self, restcountries_data):
+        """Test lookup by alpha-2 code, case-insensitively"""
+        store = CountryStore.from_restcountries(restcountries_data)
+
+        assert store.find_code("fr").name == "France"
+        assert store.find_code("AQ").name == "Antarctica"
+        assert store.find_code("zz") is None
+
+    def test_records_are_slotted_views(self, restcountries_data):
+        """Test that records carry no per-instance dict"""
+        record = CountryStore.from_restcountries(restcountries_data)[0]
+
+        assert isinstance(record, CountryRecord)
+        assert not hasattr(record, "__dict__")
+        with pytest.raises(AttributeError):
+            record.population = 1
+
+    def test_columns_are_read_only(self, restcountries_data):
+        """Test that numeric columns cannot be modified through the store"""
+        store = CountryStore.from_restcountries(restcountries_data)
+
+        assert store.populations.format == "q"
+        with pytest.raises(TypeError):
+            store.populations[0] = 0
+
+    def test_strings_are_interned(self):
+        """Test that repeated strings share one object"""
+        store = CountryStore(
+            names=["A", "B"],
+            flags=["a.png", "b.png"],
+            populations=[1, 2],
+            regions=["".join(["Eur", "ope"]), "".join(["Euro", "pe"])],
+            capitals=[None, None],
+            areas=[None, None],
+            codes=[None, None],
+        )
+
+        assert store[0].region is store[1].region is sys.intern("Europe")
+
+    def test_find_by_common_or_official_name(self, restcountries_data):
+        """Test case-insensitive name lookup"""
+        store = CountryStore.from_restcountries(restcountries_data)
+
+        assert store.find("FRANCE").name == "France"
+        assert store.find(" french republic ").name == "France"
+        assert store.find("germany") is None
+
+    def test_find_in_any_language(self, restcountries_data):
+        """Test lookup on translated names, ignoring case and accents"""
+        store = CountryStore.from_restcountries(restcountries_data)
+
+        assert store.find("frankreich").name == "France"
+        assert store.find("FRANZOSISCHE republik").name == "France"
+        assert store.find("フランス").name == "France"
+        assert store.find("frankreich", language="deu").name == "France"
+        assert store.find("frankreich", language="jpn") is None
+
+    def test_localised_countries(self, restcountries_data):
+        """Test that listings use translated names, falling back to English"""
+        store = CountryStore.from_restcountries(restcountries_data)
+
+        assert store.languages == ("deu", "jpn")
+        assert store.localised_names("deu") == ("Frankreich", "Antarctica")
+        assert store[1].translated_name("jpn") == "Antarctica"
+        assert store.resolve_language("DE") == "deu"
+        assert store.resolve_language("jpn") == "jpn"
+        assert store.resolve_language("xx") is None
+
+    def test_api_models_built_on_demand(self, restcountries_data):
+        """Test conversion to the pydantic API models"""
+        store = CountryStore.from_restcountries(restcountries_data)
+
+        countries = store.countries()
+        details = store.find("france").to_details()
+
+        assert all(isinstance(country, Country) for country in countries)
+        assert isinstance(details, CountryDetails)
+        assert details.capital == "Paris"
+        assert details.area == 551695.0
+
+    def test_version_tracks_content(self, restcountries_data):
+        """Test that the version changes only when the data does"""
+        first = CountryStore.from_restcountries(restcountries_data)
+        same = CountryStore.from_restcountries(restcountries_data)
+        restcountries_data[0]["population"] += 1
+        changed = CountryStore.from_restcountries(restcountries_data)
+        restcountries_data[0]["translations"]["deu"]["common"] = "France"
+        retranslated = CountryStore.from_restcountries(restcountries_data)
+
+        assert first.version == same.version
+        assert first.version != changed.version
+        assert changed.version != retranslated.version
+
+    def test_mismatched_columns_rejected(self):
+        """Test that columns of different lengths are refused"""
+        with pytest.raises(ValueError):
+            CountryStore(["A"], [], [1], [None], [None], [None], [None])
@@ -0,0 +1,270 @@
+import json
+import socket
+import time
+import httpx
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.controllers import CountryController
+from app.main import app
+from app.services import CountryService
+from app.upstream import FIELD_GROUPS, BundledSource, HttpSource, UpstreamPool, UpstreamSource
+from tests.fake_upstream import FakeUpstream
+
+COUNTRIES = [
+    {
+        "name": {"common": "France", "official": "French Republic"},
+        "flags": {"png": "https://flagcdn.com/w320/fr.png"},
+        "population": 67391582,
+        "capital": ["Paris"],
+        "region": "Europe",
+        "cca2": "FR",
+        "cca3": "FRA"
+    }
+]
+
+def json_routes(countries=COUNTRIES):
+    body = json.dumps(countries).encode()
+    return {
+        "/all": (200, "application/json", body),
+        **{f"/all?fields={fields}": (200, "application/json", body) for fields in FIELD_GROUPS},
+        "/alpha/fr": (200, "application/json", body),
+        "/name/france?fullText=true": (200, "application/json", body),
+    }
+
+def closed_port_url():
+    """URL on which nothing is listening"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return "http://127.0.0.1:%d" % sock.getsockname()[1]
+
+@pytest.fixture
+def primary():
+    with FakeUpstream(json_routes()) as server:
+        yield server
+
+@pytest.fixture
+def mirror():
+    with FakeUpstream(json_routes()) as server:
+        yield server
+
+def make_pool(*urls, bundled=False, **kwargs):
+    sources = [HttpSource(f"source-{i}", url, timeout=2.0) for i, url in enumerate(urls)]
+    if bundled:
+        sources.append(BundledSource())
+    return UpstreamPool(sources, **kwargs)
+
+class TestUpstreamPool:
+    """Test suite for upstream failover against local fake servers"""
+
+    @pytest.mark.asyncio
+    async def test_uses_primary_when_healthy(self, primary, mirror):
+        """Test that the first configured source serves while it is healthy"""
+        pool = make_pool(primary.url, mirror.url)
+
+        data, source = await pool.get_json("/all")
+
+        assert data[0]["name"]["common"] == "France"
+        assert source.name == "source-0"
+        assert mirror.requests == []
+
+    @pytest.mark.asyncio
+    async def test_fails_over_and_demotes(self, primary, mirror):
+        """Test that a failing source is skipped until its cooldown expires"""
+        primary.routes["/all"] = (503, "text/plain", b"down")
+        pool = make_pool(primary.url, mirror.url)
+
+        _, first = await pool.get_json("/all")
+        _, second = await pool.get_json("/all")
+
+        assert (first.name, second.name) == ("source-1", "source-1")
+        assert primary.requests == ["/all"]
+        assert pool.sources[0].failures == 1
+        assert pool.ranked()[0] is pool.sources[1]
+
+    @pytest.mark.asyncio
+    async def test_fails_over_on_connection_error(self, mirror):
+        """Test that an unreachable source fails over"""
+        pool = make_pool(closed_port_url(), mirror.url)
+
+        _, source = await pool.get_json("/all")
+
+        assert source.name == "source-1"
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_bundled_dataset(self):
+        """Test that the bundled dataset answers when every live source is down"""
+        pool = make_pool(closed_port_url(), closed_port_url(), bundled=True)
+
+        data, source = await pool.get_json("/all")
+        matches, _ = await pool.get_json("/name/France?fullText=true")
+
+        assert isinstance(source, BundledSource)
+        assert source.version
+        assert len(data) > 200
+        assert [country["cca2"] for country in matches] == ["FR"]
+
+    @pytest.mark.asyncio
+    async def test_not_found_is_authoritative(self, primary, mirror):
+        """Test that a 404 is returned as an answer, not treated as an outage"""
+        pool = make_pool(primary.url, mirror.url)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await pool.get_json("/name/atlantis?fullText=true")
+
+        assert mirror.requests == []
+        assert pool.sources[0].failures == 0
+
+    @pytest.mark.asyncio
+    async def test_client_error_on_full_list_fails_over(self, primary, mirror):
+        """Test that a 4xx for the full list counts as a source failure"""
+        primary.routes["/all"] = (400, "application/json", b'{"message": "fields required"}')
+        pool = make_pool(primary.url, mirror.url)
+
+        data, source = await pool.get_json("/all")
+
+        assert data[0]["name"]["common"] == "France"
+        assert source.name == "source-1"
+        assert pool.sources[0].failures == 1
+
+    @pytest.mark.asyncio
+    async def test_not_found_on_full_list_falls_back_to_bundled(self, primary, mirror):
+        """Test that a 404 for the full list is not mistaken for an empty answer"""
+        primary.routes.pop("/all")
+        mirror.routes.pop("/all")
+        pool = make_pool(primary.url, mirror.url, bundled=True)
+
+        data, source = await pool.get_json("/all")
+
+        assert isinstance(source, BundledSource)
+        assert len(data) > 200
+        assert (primary.requests, mirror.requests) == (["/all"], ["/all"])
+
+    @pytest.mark.asyncio
+    async def test_countries_merge_field_groups(self, primary):
+        """Test that the listing is fetched per field group and joined on CCA3"""
+        listing, geography = FIELD_GROUPS
+        primary.routes[f"/all?fields={listing}"] = (200, "application/json", json.dumps([
+            {"name": {"common": "France"}, "population": 67391582, "cca3": "FRA"},
+            {"name": {"common": "Spain"}, "population": 47351567, "cca3": "ESP"},
+        ]).encode())
+        primary.routes[f"/all?fields={geography}"] = (200, "application/json", json.dumps([
+            {"cca3": "ESP", "latlng": [40.0, -4.0]},
+            {"cca3": "FRA", "latlng": [46.0, 2.0]},
+        ]).encode())
+        pool = make_pool(primary.url)
+
+        data, _ = await pool.get_countries()
+
+        assert data == [
+            {"name": {"common": "France"}, "population": 67391582, "cca3": "FRA", "latlng": [46.0, 2.0]},
+            {"name": {"common": "Spain"}, "population": 47351567, "cca3": "ESP", "latlng": [40.0, -4.0]},
+        ]
+        assert primary.requests == [f"/all?fields={fields}" for fields in FIELD_GROUPS]
+
+    @pytest.mark.asyncio
+    async def test_countries_fail_over_as_a_whole(self, primary, mirror):
+        """Test that a failed field group refetches every group from the next source"""
+        primary.routes[f"/all?fields={FIELD_GROUPS[1]}"] = (400, "text/plain", b"too many fields")
+        pool = make_pool(primary.url, mirror.url)
+
+        data, source = await pool.get_countries()
+
+        assert data[0]["name"]["common"] == "France"
+        assert source.name == "source-1"
+        assert mirror.requests == [f"/all?fields={fields}" for fields in FIELD_GROUPS]
+
+    @pytest.mark.asyncio
+    async def test_raises_last_error_when_all_fail(self):
+        """Test that without a bundled dataset a full outage surfaces the error"""
+        pool = make_pool(closed_port_url(), closed_port_url())
+
+        with pytest.raises(httpx.ConnectError):
+            await pool.get_json("/all")
+
+    @pytest.mark.asyncio
+    async def test_prefers_lower_latency(self, primary, mirror):
+        """Test that probing steers requests to the faster source"""
+        primary.delay = 0.2
+        pool = make_pool(primary.url, mirror.url)
+
+        await pool.probe()
+        _, source = await pool.get_json("/all")
+
+        assert source.name == "source-1"
+        assert pool.sources[0].latency > pool.sources[1].latency
+
+    @pytest.mark.asyncio
+    async def test_probe_restores_recovered_source(self, primary, mirror):
+        """Test that a successful probe lifts a demotion early"""
+        primary.routes["/all"] = (500, "text/plain", b"error")
+        pool = make_pool(primary.url, mirror.url, cooldown=3600)
+        await pool.get_json("/all")
+        assert pool.sources[0].failures == 1
+
+        primary.routes.update(json_routes())
+        await pool.probe()
+
+        assert pool.sources[0].failures == 0
+        assert not pool.sources[0].is_demoted(0)
+
+    @pytest.mark.asyncio
+    async def test_demotion_backs_off(self, primary):
+        """Test that consecutive failures lengthen the demotion"""
+        primary.routes["/all"] = (500, "text/plain", b"error")
+        pool = make_pool(primary.url, cooldown=10, max_cooldown=25)
+        source = pool.sources[0]
+
+        delays = []
+        for _ in range(3):
+            with pytest.raises(httpx.HTTPStatusError):
+                await pool.get_json("/all")
+            delays.append(source.demoted_until - time.monotonic())
+
+        assert source.failures == 3
+        assert delays == pytest.approx([10, 20, 25], abs=1)
+
+class TestFailoverEndToEnd:
+    """Test suite for failover through the service and API"""
+
+    @pytest.mark.asyncio
+    async def test_service_fails_over_to_mirror(self, primary, mirror):
+        """Test that an outage of the primary does not surface to callers"""
+        primary.routes[f"/all?fields={FIELD_GROUPS[0]}"] = (502, "text/plain", b"bad gateway")
+        service = CountryService(make_pool(primary.url, mirror.url))
+
+        countries = await service.get_all_countries()
+
+        assert [country.name for country in countries] == ["France"]
+
+    def test_api_serves_bundled_dataset_during_outage(self):
+        """Test that /countries and details still answer with every live source down"""
+        controller = CountryController()
+        controller.country_service = CountryService(make_pool(closed_port_url(), bundled=True))
+        previous = getattr(app.state, "country_controller", None)
+        app.state.country_controller = controller
+        try:
+            client = TestClient(app)
+            response = client.get("/countries")
+            details = client.get("/countries/japan")
+        finally:
+            app.state.country_controller = previous
+
+        assert response.status_code == 200
+        assert len(response.json()) > 200
+        assert details.status_code == 200
+        assert details.json()["code"] == "JP"
+
+    def test_source_base_class_is_abstract(self):
+        """Test that a source must implement get_json"""
+        with pytest.raises(TypeError):
+            UpstreamSource("incomplete")
+
+    def test_pool_from_env(self):
+        """Test configuring primary, mirrors and the bundled dataset from the environment"""
+        environment = {"UPSTREAM_URLS": "http://a.example, http://b.example", "UPSTREAM_BUNDLED": "true"}
+        with patch.dict("os.environ", environment):
+            pool = UpstreamPool.from_env(timeout=5.0)
+
+        assert [source.name for source in pool.sources] == ["primary", "mirror-1", "bundled"]
+        assert pool.sources[1].base_url == "http://b.example"
@@ -1,10 +1,10 @@
 'use client';
 
-import { useState, useEffect } from 'react';
+import { useState, useEffect, type CSSProperties } from 'react';
 import Link from 'next/link';
 import Image from 'next/image';
-import { getAllCountries, checkApiHealth } from '@/lib/api';
-import { Country } from '@/types/country';
+import { getAllCountries, checkApiHealth, flagAtlasUrl } from '@/lib/api';
+import { Country, SpriteOffset } from '@/types/country';
 
 type FilterType = 'a-z' | 'z-a' | 'population-asc' | 'population-desc' | 'region';
 
@@ -284,14 +284,24 @@ function CountryCard({ country, showPopulation }: { country: Country; showPopula
       className="group block bg-white rounded-lg shadow-sm hover:shadow-md transition-all duration-200 hover:scale-105"
     >
       <div className="aspect-[3/2] relative overflow-hidden rounded-t-lg bg-gray-100">
-        <Image
-          src={country.flag}
-          alt={`Flag of ${country.name}`}
-          fill
-          className="object-cover group-hover:scale-110 transition-transform duration-300"
-          sizes="(max-width: 640px) 50vw, (max-width: 768px) 33vw, (max-width: 1024px) 25vw, (max-width: 1280px) 16vw, 12vw"
-          loading="lazy"
-        />
+        {country.sprite ? (
+          // One shared atlas download for the whole grid
+          <div
+            role="img"
+            aria-label={`Flag of ${country.name}`}
+            className="absolute inset-0 group-hover:scale-110 transition-transform duration-300"
+            style={spriteStyle(country.sprite)}
+          />
+        ) : (
+          <Image
+            src={country.flag}
+            alt={`Flag of ${country.name}`}
+            fill
+            className="object-cover group-hover:scale-110 transition-transform duration-300"
+            sizes="(max-width: 640px) 50vw, (max-width: 768px) 33vw, (max-width: 1024px) 25vw, (max-width: 1280px) 16vw, 12vw"
+            loading="lazy"
+          />
+        )}
       </div>
       <div className="p-3">
         <h3 className="text-sm font-medium text-gray-900 truncate" title={country.name}>
@@ -311,3 +321,14 @@ function CountryCard({ country, showPopulation }: { country: Country; showPopula
     </Link>
   );
 }
+
+// Scale the atlas so one tile fills the card, then shift it to this flag's tile
+function spriteStyle(sprite: SpriteOffset): CSSProperties {
+  const percent = (offset: number, tile: number, atlas: number) =>
+    atlas > tile ? (offset / (atlas - tile)) * 100 : 0;
+  return {
+    backgroundImage: `url(${flagAtlasUrl(sprite)})`,
+    backgroundSize: `${(sprite.atlas_width / sprite.width) * 100}% ${(sprite.atlas_height / sprite.height) * 100}%`,
+    backgroundPosition: `${percent(sprite.x, sprite.width, sprite.atlas_width)}% ${percent(sprite.y, sprite.height, sprite.atlas_height)}%`,
+  };
+}
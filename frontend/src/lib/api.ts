@@ -1,15 +1,25 @@
-import { Country, CountryDetails } from '@/types/country';
+import { Country, CountryDetails, SpriteOffset } from '@/types/country';
 
 // Backend API base URL - using the port where our backend is running
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8001';
 
+/**
+ * Single image holding every flag thumbnail
+ * Each `sprite` names the atlas its offsets belong to, addressed by content hash
+ */
+export function flagAtlasUrl(sprite: SpriteOffset): string {
+  return `${API_BASE_URL}${sprite.atlas_url}`;
+}
+
 /**
  * Fetch all countries with basic information (name and flag)
  * Connects to our backend API which handles the external REST Countries API
+ * Pass `lang` (e.g. 'de') for localised country names
  */
-export async function getAllCountries(): Promise<Country[]> {
+export async function getAllCountries(lang?: string): Promise<Country[]> {
   try {
-    const response = await fetch(`${API_BASE_URL}/countries`);
+    const query = lang ? `?lang=${encodeURIComponent(lang)}` : '';
+    const response = await fetch(`${API_BASE_URL}/countries${query}`);
     if (!response.ok) {
       throw new Error(`Failed to fetch countries: ${response.status}`);
     }
@@ -1,10 +1,22 @@
 // Types matching the backend API exactly
 
+// Position of a flag thumbnail within the backend flag atlas at `atlas_url`
+export interface SpriteOffset {
+  atlas_url: string;
+  x: number;
+  y: number;
+  width: number;
+  height: number;
+  atlas_width: number;
+  atlas_height: number;
+}
+
 export interface Country {
   name: string;
   flag: string;
   population: number;
   region?: string;
+  sprite?: SpriteOffset | null;
 }
 
 export interface CountryDetails {